@@ -0,0 +1,82 @@
+"""Per-client rate limits for Socket.IO events.
+
+Each client key (a connection's sid or a client IP, with the event name)
+has a token bucket that refills at rate tokens per second up to burst
+tokens, and every limited event takes its cost in tokens. A client that
+sends faster than its rate is told how long to wait instead of being
+served, so one misbehaving client or bot only ever uses its own share of
+the server.
+
+Limits are given as "RATE/BURST" strings, e.g. "2/10" for two events a
+second with bursts of up to ten; an empty string disables the limit.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+# Buckets kept at most; the least recently used are dropped first, and a
+# dropped bucket is recreated full, as it would have refilled anyway
+MAX_TRACKED_KEYS = 100000
+
+def parse_limit(limit):
+    """(rate, burst) from a "RATE/BURST" string, or None for an empty one"""
+    if not limit:
+        return None
+    try:
+        rate, burst = (float(part) for part in limit.split('/'))
+    except ValueError:
+        raise ValueError(f"Rate limit '{limit}' must look like RATE/BURST, e.g. 2/10")
+    if rate <= 0 or burst < 1:
+        raise ValueError(f"Rate limit '{limit}' needs a positive rate and a burst of at least 1")
+    return rate, burst
+
+class RateLimiter:
+    """Token buckets by client key"""
+    
+    def __init__(self, rate, burst, max_keys=MAX_TRACKED_KEYS, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> [tokens, time they were counted]
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._buckets)
+    
+    def acquire(self, key, cost=1.0):
+        """Take cost tokens from key's bucket; returns 0.0, or the seconds until they are there"""
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return 0.0
+            return (cost - bucket[0]) / self.rate
+    
+    def refund(self, key, cost=1.0):
+        """Give back tokens taken by acquire(), e.g. when another limit turned the event away"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket[0] = min(self.burst, bucket[0] + cost)
+    
+    def forget(self, key):
+        """Drop a key's bucket, e.g. when its connection closes"""
+        with self._lock:
+            self._buckets.pop(key, None)
+
+def retry_after_seconds(wait):
+    """Whole seconds a client is told to wait, at least one"""
+    return max(1, math.ceil(wait))
@@ -0,0 +1,116 @@
+import sys
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+def normalize_answer(answer):
+    """Drop the leading and repeated trailing whitespace no metric can see"""
+    # Leading whitespace never starts a match and does not change word
+    # boundaries. One trailing whitespace character can complete a list
+    # marker ("1. ", "- "), so a trailing run is kept as its first character.
+    answer = answer.lstrip()
+    stripped = answer.rstrip()
+    if len(stripped) < len(answer):
+        return answer[:len(stripped) + 1]
+    return answer
+
+def answer_digest(answer, question=''):
+    """Fixed-size key for the normalized answer text and the question it answers"""
+    # The relevance metric compares the answer with its question, so the same
+    # answer to another question is another entry. The question is length
+    # prefixed so no two (question, answer) pairs share an encoding.
+    normalized = normalize_answer(answer).encode('utf-8', 'surrogatepass')
+    encoded_question = question.encode('utf-8', 'surrogatepass')
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(len(encoded_question).to_bytes(8, 'little'))
+    digest.update(encoded_question)
+    digest.update(normalized)
+    return digest.digest()
+
+class AnalysisCache:
+    """Bounded LRU cache of (score, metrics) keyed by role and answer digest"""
+    
+    # Entries are only valid for the knowledge base and weights they were
+    # computed with; a lookup with a different fingerprint clears the cache.
+    
+    def __init__(self, max_entries=4096, max_bytes=8 * 1024 * 1024, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.fingerprint = None
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, fingerprint, role, digest):
+        """Cached (score, metrics) or None; a fresh metrics dict every time"""
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                self._reset(fingerprint)
+            entry = self._entries.get((role, digest))
+            if entry is None:
+                self.misses += 1
+                return None
+            score, keys, values, expires, size = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[(role, digest)]
+                self.size_bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end((role, digest))
+            self.hits += 1
+        return score, dict(zip(keys, values))
+    
+    def put(self, fingerprint, role, digest, score, metrics):
+        keys = tuple(metrics)
+        values = tuple(metrics.values())
+        # Keys are the engine's interned metric names, so only the entry's own
+        # containers and numbers count towards the memory bound
+        size = (sys.getsizeof(digest) + sys.getsizeof(values) + sys.getsizeof(score)
+                + sum(sys.getsizeof(value) for value in values) + 64)
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                self._reset(fingerprint)
+            previous = self._entries.pop((role, digest), None)
+            if previous is not None:
+                self.size_bytes -= previous[4]
+            self._entries[(role, digest)] = (score, keys, values, expires, size)
+            self.size_bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= evicted[4]
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._reset(self.fingerprint)
+    
+    def _reset(self, fingerprint):
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self.size_bytes = 0
+        self.fingerprint = fingerprint
+    
+    def stats(self):
+        """Counters for monitoring the cache"""
+        return {
+            'entries': len(self._entries),
+            'bytes': self.size_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations
+        }
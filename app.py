@@ -1,32 +1,373 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, abort
 from flask_socketio import SocketIO, emit, join_room, leave_room
+import os
 import json
+import hashlib
+import hmac
+import time
 from datetime import datetime
+from functools import wraps
 import random
-from ai_engine import AIInterviewer
+import sys
+import threading
+import uuid
+from ai_engine import AIInterviewer, get_shared_engine, analyze_answer, SCORED_VALUES
+from evaluation_pool import EvaluationPool
+from admission import RateLimiter, parse_limit, retry_after_seconds
+from session_store import create_session_store, session_from_state
+from interview_log import InterviewLog
+from quantile_sketch import ScoreDistributions
+from duplicate_index import DuplicateIndex
+from results_archive import ResultArchive, EXPORT_FORMATS, EXPORT_MIMETYPES, iter_export
+from analysis_cache import AnalysisCache
+from instrumentation import Registry, profiled_call
+from message_queue import message_queue_options
+from protocol import negotiate_protocol, answer_result_frame
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Where answer evaluation runs: 'thread', 'process' (CPU-bound scoring) or 'inline'
+app.config['EVALUATION_BACKEND'] = os.environ.get('EVALUATION_BACKEND', 'thread')
+app.config['EVALUATION_WORKERS'] = int(os.environ.get('EVALUATION_WORKERS', '4'))
+app.config['EVALUATION_QUEUE_SIZE'] = int(os.environ.get('EVALUATION_QUEUE_SIZE', '64'))
+app.config['EVALUATION_TIMEOUT'] = float(os.environ.get('EVALUATION_TIMEOUT', '10'))
+# Answers that would wait longer than this for an evaluation worker are
+# turned away with a retry-after hint instead of queued; 0 only rejects when full
+app.config['EVALUATION_MAX_WAIT'] = float(os.environ.get('EVALUATION_MAX_WAIT', '5')) or None
+# Token-bucket limits on the costly Socket.IO events, as "RATE/BURST" (events
+# per second / largest burst), per connection and per client IP; empty
+# disables one. The per-IP limits are shared by everyone behind one NAT, such
+# as a classroom or office. Live draft updates have their own buckets, so
+# typing never uses up the budget for submitting. Behind a reverse proxy,
+# RATE_LIMIT_TRUST_FORWARDED=1 takes the client IP from X-Forwarded-For.
+app.config['RATE_LIMIT_SID'] = os.environ.get('RATE_LIMIT_SID', '1/10')
+app.config['RATE_LIMIT_IP'] = os.environ.get('RATE_LIMIT_IP', '20/100')
+app.config['RATE_LIMIT_DRAFT_SID'] = os.environ.get('RATE_LIMIT_DRAFT_SID', '5/20')
+app.config['RATE_LIMIT_DRAFT_IP'] = os.environ.get('RATE_LIMIT_DRAFT_IP', '100/400')
+app.config['RATE_LIMIT_TRUST_FORWARDED'] = os.environ.get('RATE_LIMIT_TRUST_FORWARDED', '0') == '1'
+# 'memory' for a single process, or 'sqlite:///path.db' / 'redis://host:6379/0' to share
+# sessions between workers. Sessions are kept by session id for SESSION_TTL
+# seconds after their last change, so a candidate can reconnect and resume.
+app.config['SESSION_STORE'] = os.environ.get('SESSION_STORE', 'memory')
+app.config['SESSION_TTL'] = float(os.environ.get('SESSION_TTL', str(24 * 60 * 60)))
+# Directory of a durable interview log; interviews in progress are replayed
+# from it on startup so candidates can resume them (one process per directory)
+app.config['INTERVIEW_LOG'] = os.environ.get('INTERVIEW_LOG', '')
+# SQLite file completed interviews are archived in for the export routes;
+# bulk export additionally needs EXPORT_TOKEN sent as a bearer token
+app.config['RESULTS_ARCHIVE'] = os.environ.get('RESULTS_ARCHIVE', '')
+app.config['EXPORT_TOKEN'] = os.environ.get('EXPORT_TOKEN', '')
+# Directory shared by the workers where score distributions are saved, so
+# percentiles survive restarts and include other workers' candidates
+app.config['SCORE_DISTRIBUTIONS'] = os.environ.get('SCORE_DISTRIBUTIONS', '')
+# SQLite file of answer signatures that every answer is checked against for
+# near-duplicates from other interviews; unset keeps them in memory. Answers
+# whose estimated similarity reaches DUPLICATE_THRESHOLD are flagged.
+app.config['DUPLICATE_INDEX'] = os.environ.get('DUPLICATE_INDEX', '')
+app.config['DUPLICATE_THRESHOLD'] = float(os.environ.get('DUPLICATE_THRESHOLD', '0.8'))
+# The index keeps at most DUPLICATE_MAX_ANSWERS answers, none older than
+# DUPLICATE_MAX_AGE seconds; 0 lifts either bound
+app.config['DUPLICATE_MAX_ANSWERS'] = int(os.environ.get('DUPLICATE_MAX_ANSWERS', '200000')) or None
+app.config['DUPLICATE_MAX_AGE'] = float(os.environ.get('DUPLICATE_MAX_AGE', str(90 * 24 * 60 * 60))) or None
+# Cache of scores for repeated answers; ANALYSIS_CACHE_SIZE=0 disables it
+app.config['ANALYSIS_CACHE_SIZE'] = int(os.environ.get('ANALYSIS_CACHE_SIZE', '4096'))
+app.config['ANALYSIS_CACHE_MAX_BYTES'] = int(os.environ.get('ANALYSIS_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+app.config['ANALYSIS_CACHE_TTL'] = float(os.environ.get('ANALYSIS_CACHE_TTL', '0')) or None
+# 'sequential' asks every question of the role in order, 'adaptive' picks
+# questions that probe the candidate's weakest metrics; clients may choose
+app.config['QUESTION_MODE'] = os.environ.get('QUESTION_MODE', 'sequential')
+# Characters of an answer that are analyzed at most; 0 analyzes everything
+app.config['ANALYSIS_MAX_CHARS'] = int(os.environ.get('ANALYSIS_MAX_CHARS', '0')) or None
+# KNOWLEDGE_INDEX (a compiled knowledge base, see knowledge_index.py) is read
+# by the AI engine itself, so evaluation worker processes load the same file
+# Latency histograms and gauges on /metrics; when off, handlers only pay a flag check
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') == '1'
+# Lets a client send {"profile": true} with an event to sample that request's stacks
+app.config['PROFILING_ENABLED'] = os.environ.get('PROFILING_ENABLED', '0') == '1'
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', 'profiles')
+# Socket.IO server: ASYNC_MODE 'eventlet' or 'gevent' holds many idle connections
+# without a thread each (serve.py sets it); unset picks the best installed mode.
+# MESSAGE_QUEUE ('redis://...', or 'local://' in-process for tests) shares
+# emits between worker processes.
+app.config['ASYNC_MODE'] = os.environ.get('ASYNC_MODE') or None
+app.config['MESSAGE_QUEUE'] = os.environ.get('MESSAGE_QUEUE', '')
+# Comma-separated transports for the browser client, e.g. 'websocket' when
+# several workers share a port without sticky sessions
+app.config['SOCKET_TRANSPORTS'] = [t for t in os.environ.get('SOCKET_TRANSPORTS', '').split(',') if t]
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode=app.config['ASYNC_MODE'],
+    **message_queue_options(app.config['MESSAGE_QUEUE'])
+)
 
-# Interview sessions storage
-interview_sessions = {}
+evaluation_pool = EvaluationPool(
+    backend=app.config['EVALUATION_BACKEND'],
+    max_workers=app.config['EVALUATION_WORKERS'],
+    max_queue=app.config['EVALUATION_QUEUE_SIZE'],
+    timeout=app.config['EVALUATION_TIMEOUT'],
+    max_wait=app.config['EVALUATION_MAX_WAIT']
+)
+
+def create_rate_limiters(sid_limit, ip_limit):
+    """Per-client limiters by scope; a disabled scope is left out"""
+    return {
+        scope: RateLimiter(*limit)
+        for scope, limit in (('sid', parse_limit(sid_limit)), ('ip', parse_limit(ip_limit)))
+        if limit is not None
+    }
+
+# Per-client limits, for live drafts separately from the other events
+rate_limiters = create_rate_limiters(app.config['RATE_LIMIT_SID'], app.config['RATE_LIMIT_IP'])
+draft_rate_limiters = create_rate_limiters(app.config['RATE_LIMIT_DRAFT_SID'], app.config['RATE_LIMIT_DRAFT_IP'])
+
+# Analysis cache in front of the shared engine (worker processes keep their own)
+analysis_cache = None
+if app.config['ANALYSIS_CACHE_SIZE'] > 0:
+    analysis_cache = AnalysisCache(
+        max_entries=app.config['ANALYSIS_CACHE_SIZE'],
+        max_bytes=app.config['ANALYSIS_CACHE_MAX_BYTES'],
+        ttl=app.config['ANALYSIS_CACHE_TTL']
+    )
+get_shared_engine().analysis_cache = analysis_cache
+
+# Candidates are ranked against earlier answers to the same question
+score_distributions = ScoreDistributions(SCORED_VALUES)
+if app.config['SCORE_DISTRIBUTIONS']:
+    score_distributions.persist(app.config['SCORE_DISTRIBUTIONS'])
+get_shared_engine().score_distributions = score_distributions
+
+# Answers copied between candidates or from shared answer dumps are flagged
+duplicate_index = DuplicateIndex(
+    app.config['DUPLICATE_INDEX'] or ':memory:', threshold=app.config['DUPLICATE_THRESHOLD'],
+    max_answers=app.config['DUPLICATE_MAX_ANSWERS'], max_age=app.config['DUPLICATE_MAX_AGE']
+)
+
+# Interview sessions storage, by session id
+interview_sessions = create_session_store(app.config['SESSION_STORE'], app.config['SESSION_TTL'])
+
+# Which interview each connection to this process is taking (sid -> session
+# id), and how many of them take each one. Events for an interview are
+# emitted to a room named by its session id, which its connections join.
+connection_sessions = {}
+session_connections = {}
+connections_lock = threading.Lock()
+
+# Interviews replayed from the log, by session id, until their candidate resumes them
+interview_log = None
+recovered_interviews = {}
+if app.config['INTERVIEW_LOG']:
+    interview_log = InterviewLog(app.config['INTERVIEW_LOG'])
+    recovered_interviews = interview_log.recover()
+
+# Completed interviews outlive their connection here
+results_archive = ResultArchive(app.config['RESULTS_ARCHIVE']) if app.config['RESULTS_ARCHIVE'] else None
+
+# Instrumentation exposed on /metrics
+metrics_registry = Registry(enabled=app.config['METRICS_ENABLED'])
+EVENT_SECONDS = metrics_registry.histogram(
+    'interview_event_seconds', 'Time spent in Socket.IO event handlers.', labels=('event',))
+METRIC_SECONDS = metrics_registry.histogram(
+    'interview_metric_seconds', 'Time spent computing each answer metric.', labels=('metric',))
+EVALUATION_SECONDS = metrics_registry.histogram(
+    'interview_evaluation_seconds', 'Time from answer submission to evaluation delivery.')
+SESSIONS_ACTIVE = metrics_registry.gauge(
+    'interview_sessions_active', 'Connections to this process taking an interview in progress.')
+SESSIONS_COMPLETED = metrics_registry.gauge(
+    'interview_sessions_completed', 'Connections to this process holding a completed interview for feedback.')
+metrics_registry.gauge(
+    'interview_evaluation_queue_depth', 'Evaluations queued or running on the evaluation pool.',
+    callback=evaluation_pool.queue_depth)
+metrics_registry.counter(
+    'interview_evaluations_rejected_total', 'Answers turned away because the evaluation pool was overloaded.',
+    callback=lambda: evaluation_pool.rejected)
+RATE_LIMITED = metrics_registry.counter(
+    'interview_rate_limited_total', 'Events rejected by a per-client rate limit.', labels=('scope', 'event'))
+EVALUATION_ERRORS = metrics_registry.counter(
+    'interview_evaluation_errors_total', 'Answers whose evaluation failed and had to be submitted again.')
+RECORD_ERRORS = metrics_registry.counter(
+    'interview_record_errors_total', 'Answers or results the interview log, results archive or duplicate index failed to record.',
+    labels=('store',))
+for scope, limiter in rate_limiters.items():
+    metrics_registry.gauge(
+        f'interview_rate_limit_{scope}_keys', f'Client and event buckets tracked by the per-{scope} rate limit.',
+        callback=limiter.__len__)
+for scope, limiter in draft_rate_limiters.items():
+    metrics_registry.gauge(
+        f'interview_rate_limit_draft_{scope}_keys', f'Client buckets tracked by the per-{scope} draft rate limit.',
+        callback=limiter.__len__)
+metrics_registry.counter(
+    'interview_duplicate_lookups_total', 'Answers checked against the near-duplicate index.',
+    callback=lambda: duplicate_index.lookups)
+metrics_registry.counter(
+    'interview_duplicate_answers_total', 'Answers flagged as near-duplicates of another interview\'s answer.',
+    callback=lambda: duplicate_index.duplicates)
+metrics_registry.counter(
+    'interview_duplicate_pruned_total', 'Answers pruned from the near-duplicate index by age or capacity.',
+    callback=lambda: duplicate_index.pruned)
+if analysis_cache is not None:
+    for counter in ('hits', 'misses', 'evictions', 'expirations', 'invalidations'):
+        metrics_registry.counter(
+            f'interview_analysis_cache_{counter}_total', f'Analysis cache {counter}.',
+            callback=lambda counter=counter: getattr(analysis_cache, counter))
+    metrics_registry.gauge(
+        'interview_analysis_cache_entries', 'Answers held in the analysis cache.',
+        callback=lambda: len(analysis_cache))
+    metrics_registry.gauge(
+        'interview_analysis_cache_bytes', 'Estimated memory held by the analysis cache.',
+        callback=lambda: analysis_cache.size_bytes)
+if metrics_registry.enabled:
+    # Per-metric timings are only measured by engines in this process
+    get_shared_engine().metric_observer = lambda step, seconds: METRIC_SECONDS.observe(seconds, step)
+
+def profile_path(event):
+    """File that receives the folded stacks of one profiled request"""
+    os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+    name = f'{event}-{datetime.now().strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}.folded'
+    return os.path.join(app.config['PROFILE_DIR'], name)
+
+def profile_requested(data):
+    return app.config['PROFILING_ENABLED'] and isinstance(data, dict) and bool(data.get('profile'))
+
+def instrumented(event):
+    """Record an event handler's latency and profile it when the client asks"""
+    def decorator(handler):
+        timed_handler = metrics_registry.timed(EVENT_SECONDS, event)(handler)
+        
+        @wraps(handler)
+        def wrapper(*args):
+            if args and profile_requested(args[0]):
+                return profiled_call(timed_handler, args, profile_path(event))
+            return timed_handler(*args)
+        return wrapper
+    return decorator
+
+def client_address():
+    """IP address of the client behind the current event"""
+    if app.config['RATE_LIMIT_TRUST_FORWARDED'] and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr or 'unknown'
+
+# Events with rate limits; every event has its own buckets, so resuming
+# never uses up the budget for submitting
+rate_limited_events = []
+
+def rate_limited(event, limiters=rate_limiters, notify=True):
+    """Reject an event, with a retry-after hint unless notify is off, once its client is over its rate limit"""
+    rate_limited_events.append(event)
+    
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(*args):
+            # Tokens are only kept when every limit lets the event through
+            taken = []
+            for scope, limiter in limiters.items():
+                key = (event, request.sid if scope == 'sid' else client_address())
+                wait = limiter.acquire(key)
+                if wait:
+                    for taken_limiter, taken_key in taken:
+                        taken_limiter.refund(taken_key)
+                    RATE_LIMITED.inc(1, scope, event)
+                    if notify:
+                        retry_after = retry_after_seconds(wait)
+                        emit('error', {
+                            'message': f'Too many requests. Please try again in {retry_after} seconds.',
+                            'retryAfter': retry_after
+                        })
+                    return None
+                taken.append((limiter, key))
+            return handler(*args)
+        return wrapper
+    return decorator
+
+# Guards the check-and-set of a session's status and evaluating flag
+session_status_lock = threading.Lock()
+
+# Minimum seconds between live metric hints sent to one candidate
+DRAFT_HINT_INTERVAL = 1.0
 
 # Interview questions are now handled by the AI engine
 
 # AI Interviewer class is now imported from ai_engine.py
 
+# The roles list and its ETag only change when a compiled knowledge base is
+# reloaded, so they are rebuilt per knowledge base fingerprint
+roles_response_cache = {}
+
+def roles_response_body():
+    engine = get_shared_engine()
+    fingerprint = engine.fingerprint
+    cached = roles_response_cache.get('roles')
+    if cached is None or cached[0] != fingerprint:
+        roles = [role for role in engine.knowledge_base.keys() if role != 'general'] + ['general']
+        body = json.dumps(roles)
+        cached = (fingerprint, body, hashlib.sha1(body.encode('utf-8')).hexdigest())
+        roles_response_cache['roles'] = cached
+    return cached[1], cached[2]
+
 # Routes
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_template('index.html', socket_transports=app.config['SOCKET_TRANSPORTS'])
 
 @app.route('/api/roles')
 def get_roles():
-    # Get roles from the AI engine knowledge base
-    from ai_engine import AdvancedAIEngine
-    ai_engine = AdvancedAIEngine()
-    return jsonify(list(ai_engine.knowledge_base.keys()) + ['general'])
+    # Roles come from the shared AI engine knowledge base; answer 304 when the
+    # client already has this version
+    body, etag = roles_response_body()
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
+
+@app.route('/metrics')
+def metrics():
+    if not metrics_registry.enabled:
+        abort(404)
+    return app.response_class(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/interviews/<session_id>/export')
+def export_interview(session_id):
+    # The session id is only known to the candidate who took the interview
+    if results_archive is None:
+        abort(404)
+    export_format = request.args.get('format', 'json')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unknown export format: {export_format}'}), 400
+    state = results_archive.get(session_id)
+    if state is None:
+        abort(404)
+    return export_response([state], export_format, f'interview-{session_id}', single=True)
+
+@app.route('/api/interviews/export')
+def export_interviews():
+    if results_archive is None or not app.config['EXPORT_TOKEN']:
+        abort(404)
+    expected = f"Bearer {app.config['EXPORT_TOKEN']}"
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+        abort(401)
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unknown export format: {export_format}'}), 400
+    try:
+        since = parse_export_time(request.args.get('since'))
+        until = parse_export_time(request.args.get('until'))
+    except ValueError:
+        return jsonify({'error': 'since and until must be ISO 8601 times'}), 400
+    return export_response(results_archive.iter_range(since, until), export_format, 'interviews')
+
+def parse_export_time(value):
+    """Unix time of an ISO 8601 query parameter, or None when it is missing"""
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+def export_response(states, export_format, name, single=False):
+    """Stream an export; without a length the response is sent chunked as it is generated"""
+    return app.response_class(
+        iter_export(states, export_format, single),
+        mimetype=EXPORT_MIMETYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{name}.{export_format}"'}
+    )
 
 # Socket.IO events
 @socketio.on('connect')
@@ -36,73 +377,345 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     print(f'Client disconnected: {request.sid}')
-    if request.sid in interview_sessions:
-        del interview_sessions[request.sid]
+    # The session stays in the store so the candidate can resume it
+    session_id = unbind_connection()
+    if session_id is not None:
+        with connections_lock:
+            served = session_id in session_connections
+        if not served:
+            interview_sessions.release(session_id)
+    for limiters in (rate_limiters, draft_rate_limiters):
+        if 'sid' in limiters:
+            for event in rate_limited_events:
+                limiters['sid'].forget((event, request.sid))
+
+def current_session():
+    """Session of the interview the current connection is taking, or None"""
+    session_id = connection_sessions.get(request.sid)
+    return interview_sessions.get(session_id) if session_id is not None else None
+
+def bind_connection(session):
+    """Make session the interview of the current connection"""
+    unbind_connection()
+    with connections_lock:
+        connection_sessions[request.sid] = session['id']
+        session_connections[session['id']] = session_connections.get(session['id'], 0) + 1
+    join_room(session['id'])
+    adjust_session_gauges(session.get('status'), 1)
+
+def unbind_connection():
+    """Detach the current connection from its interview; returns the session id it had"""
+    with connections_lock:
+        session_id = connection_sessions.pop(request.sid, None)
+        if session_id is None:
+            return None
+        remaining = session_connections[session_id] - 1
+        if remaining:
+            session_connections[session_id] = remaining
+        else:
+            del session_connections[session_id]
+    leave_room(session_id)
+    if metrics_registry.enabled:
+        session = interview_sessions.get(session_id)
+        if session is not None:
+            adjust_session_gauges(session.get('status'), -1)
+    return session_id
+
+def adjust_session_gauges(status, connections):
+    """Count connections gained (or lost, when negative) by an interview with this status"""
+    if status == 'active':
+        SESSIONS_ACTIVE.inc(connections)
+    elif status == 'completed':
+        SESSIONS_COMPLETED.inc(connections)
 
 @socketio.on('start-interview')
+@instrumented('start-interview')
+@rate_limited('start-interview')
 def handle_start_interview(data):
     role = data.get('role', 'general')
     candidate_name = data.get('candidateName', 'Candidate')
+    question_mode = data.get('questionMode', app.config['QUESTION_MODE'])
+    # Clients that can decode it ask for the compact protocol
+    protocol = negotiate_protocol(data.get('protocol'))
+    if question_mode not in AIInterviewer.QUESTION_MODES:
+        emit('error', {'message': f'Unknown question mode: {question_mode}'})
+        return
     
     # Create new interviewer instance
-    interviewer = AIInterviewer(role)
+    interviewer = AIInterviewer(role, question_mode=question_mode)
+    
+    # Get first question
+    first_question = interviewer.get_next_question()
     
     # Store session
-    interview_sessions[request.sid] = {
+    session = {
+        'id': uuid.uuid4().hex,
         'interviewer': interviewer,
         'candidateName': candidate_name,
         'startTime': datetime.now(),
-        'status': 'active'
+        'status': 'active',
+        'protocol': protocol
     }
-    
-    # Get first question
-    first_question = interviewer.get_next_question()
+    interview_sessions.save(session['id'], session)
+    # Restarting replaces the previous interview of this connection
+    bind_connection(session)
+    if interview_log is not None:
+        try:
+            interview_log.log_start(session, first_question)
+        except Exception as error:
+            record_failed('log', session['id'], error)
     
     emit('interview-started', {
         'message': f'Welcome {candidate_name}! Let\'s begin your {role} interview.',
-        'firstQuestion': first_question
+        'firstQuestion': first_question,
+        'protocol': protocol,
+        'sessionId': session['id']
     })
 
+@socketio.on('resume-interview')
+@rate_limited('resume-interview')
+def handle_resume_interview(data):
+    # Sessions are found in the store after a reconnect (to any worker sharing
+    # it), or among the interviews replayed from the interview log after a restart
+    session_id = data.get('sessionId')
+    if not isinstance(session_id, str):
+        emit('resume-failed', {'message': 'This interview can no longer be resumed.'})
+        return
+    session = interview_sessions.get(session_id)
+    if session is None:
+        state = recovered_interviews.pop(session_id, None)
+        if state is None:
+            emit('resume-failed', {'message': 'This interview can no longer be resumed.'})
+            return
+        session = session_from_state(state)
+        current_question = state.get('currentQuestion')
+        if current_question:
+            session['interviewer'].current_question = current_question['question']
+        interview_sessions.save(session['id'], session)
+    bind_connection(session)
+    
+    role = session['interviewer'].role
+    active = session['status'] == 'active'
+    emit('interview-resumed', {
+        'message': f'Welcome back {session["candidateName"]}! Let\'s continue your {role} interview.',
+        'question': session['interviewer'].current_question_info() if active else None,
+        'candidateName': session['candidateName'],
+        'role': role,
+        'protocol': session['protocol'],
+        'sessionId': session['id']
+    })
+    if not active:
+        emit('interview-completed', session['summary'])
+
 @socketio.on('submit-answer')
+@instrumented('submit-answer')
+@rate_limited('submit-answer')
 def handle_submit_answer(data):
-    session = interview_sessions.get(request.sid)
+    session = current_session()
     if not session:
         emit('error', {'message': 'No active interview session found.'})
         return
     
     answer = data.get('answer', '')
-    question = data.get('question', '')
+    # Scored against the question this server asked, whatever the client says it was
+    question = session['interviewer'].current_question or ''
     
     if not answer or len(answer.strip()) < 10:
         emit('error', {'message': 'Please provide a detailed answer (at least 10 characters).'})
         return
     
-    # Evaluate answer
-    evaluation = session['interviewer'].evaluate_answer(answer, question)
-    emit('answer-evaluated', evaluation)
+    # Checked and claimed together, so answers sent twice at once or after
+    # the last question are never evaluated
+    with session_status_lock:
+        if session.get('status') != 'active':
+            emit('error', {'message': 'This interview is already complete.'})
+            return
+        if session.get('evaluating'):
+            emit('error', {'message': 'Your previous answer is still being evaluated.'})
+            return
+        session['evaluating'] = True
+    
+    # Evaluate answer on the evaluation pool so this handler never blocks;
+    # a live draft means only the final delta is left to analyze, and the
+    # draft is skipped when that delta is large or the answer over budget
+    interviewer = session['interviewer']
+    max_chars = app.config['ANALYSIS_MAX_CHARS']
+    metrics = interviewer.finalize_draft(answer, question, max_chars)
+    submitted = time.perf_counter()
+    
+    # The pool drops exceptions from these callbacks, so each one reports
+    # its own failure instead of leaving the answer evaluating forever
+    def on_done(result):
+        try:
+            duplicate = check_duplicate(session, answer)
+            evaluation = interviewer.record_evaluation(answer, question, *result, duplicate=duplicate)
+            deliver_evaluation(session, evaluation, submitted)
+        except Exception as error:
+            evaluation_failed(session, error)
+    
+    def on_degraded():
+        try:
+            duplicate = check_duplicate(session, answer)
+            deliver_evaluation(session, interviewer.degraded_evaluation(answer, question, duplicate), submitted)
+        except Exception as error:
+            evaluation_failed(session, error)
+    
+    interview_sessions.save(session['id'], session)
+    task, task_args = analyze_answer, (answer, question, interviewer.role, None, metrics, max_chars)
+    if profile_requested(data):
+        # The scoring itself runs on the pool, so profile it there as well
+        task, task_args = profiled_call, (analyze_answer, task_args, profile_path('evaluation'))
+    if not evaluation_pool.submit(task, task_args, on_done, on_degraded):
+        session['evaluating'] = False
+        interview_sessions.save(session['id'], session)
+        retry_after = retry_after_seconds(evaluation_pool.retry_after())
+        emit('error', {
+            'message': f'The server is busy. Please submit your answer again in {retry_after} seconds.',
+            'retryAfter': retry_after
+        })
+
+def check_duplicate(session, answer):
+    """Similarity of the closest answer from another interview if this one copies it, else None"""
+    # Runs on an evaluation pool thread; the answer is indexed for later lookups.
+    # An index failure only costs the duplicate flag.
+    try:
+        match = duplicate_index.check(session['id'], answer)
+    except Exception as error:
+        record_failed('duplicate index', session['id'], error)
+        return None
+    return round(match.similarity, 2) if match else None
+
+def evaluation_failed(session, error):
+    """Let the candidate submit again after their answer could not be evaluated"""
+    EVALUATION_ERRORS.inc()
+    print(f'Could not evaluate an answer of interview {session["id"]}: {error}', file=sys.stderr)
+    session['evaluating'] = False
+    try:
+        interview_sessions.save(session['id'], session)
+    except Exception as save_error:
+        print(f'Could not save interview {session["id"]}: {save_error}', file=sys.stderr)
+    socketio.emit('error', {
+        'message': 'Your answer could not be evaluated. Please submit it again.'
+    }, to=session['id'])
+
+def record_failed(store, session_id, error):
+    """Report an interview the log or results archive could not record"""
+    RECORD_ERRORS.inc(1, store)
+    print(f'Could not record interview {session_id} in the {store}: {error}', file=sys.stderr)
+
+def deliver_evaluation(session, evaluation, submitted):
+    """Send an evaluation and whatever comes next; runs on an evaluation pool thread"""
+    # Everything goes to the interview's room, so a candidate who reconnected
+    # meanwhile still gets it, and one who has not yet finds it on resuming
+    if metrics_registry.enabled:
+        EVALUATION_SECONDS.observe(time.perf_counter() - submitted)
+    session['evaluating'] = False
+    room = session['id']
+    current = interview_sessions.get(room)
+    if current is None or current['status'] != 'active':
+        # Expired while the answer was evaluated
+        return
+    
+    # Compact clients get the evaluation together with what follows it
+    compact = session.get('protocol') == 'compact'
+    if not compact:
+        socketio.emit('answer-evaluated', evaluation, to=room)
     
     # Get next question
     next_question = session['interviewer'].get_next_question()
-    if next_question:
-        emit('next-question', next_question)
-    else:
-        # Interview completed
+    if not next_question:
+        # Interview completed; only the first evaluation to get here completes
+        # it, so gauges, distributions, log and archive count it once
+        with session_status_lock:
+            if session['status'] != 'active':
+                return
+            session['status'] = 'completed'
         summary = session['interviewer'].get_interview_summary()
-        session['status'] = 'completed'
         session['endTime'] = datetime.now()
         session['summary'] = summary
-        
-        emit('interview-completed', summary)
+        interviewer = session['interviewer']
+        if interviewer.ranked:
+            score_distributions.add_interview(interviewer.role, interviewer.stats.average_score())
+        with connections_lock:
+            connections = session_connections.get(room, 0)
+        adjust_session_gauges('active', -connections)
+        adjust_session_gauges('completed', connections)
+    
+    # Persist before emitting so the candidate's next event sees this state
+    interview_sessions.save(room, session)
+    # A failing log or archive loses durability, not the candidate's evaluation
+    if interview_log is not None:
+        try:
+            interview_log.log_answer(session, next_question)
+            if not next_question:
+                interview_log.log_completion(session)
+        except Exception as error:
+            record_failed('log', room, error)
+    if results_archive is not None and not next_question:
+        try:
+            results_archive.add(session)
+        except Exception as error:
+            record_failed('archive', room, error)
+    
+    if compact:
+        frame = answer_result_frame(evaluation, next_question, session.get('summary'))
+        socketio.emit('answer-result', frame, to=room)
+    elif next_question:
+        socketio.emit('next-question', next_question, to=room)
+    else:
+        socketio.emit('interview-completed', session['summary'], to=room)
+
+@socketio.on('answer-draft')
+@rate_limited('answer-draft', draft_rate_limiters, notify=False)
+def handle_answer_draft(data):
+    session = current_session()
+    if not session or session.get('status') != 'active':
+        return
+    
+    offset = data.get('offset', 0)
+    text = data.get('text', '')
+    if not isinstance(offset, int) or not isinstance(text, str):
+        return
+    
+    # Update the incremental analysis so submit only has to finalize the last delta
+    draft = session['interviewer'].update_draft(offset, text)
+    
+    # Throttled live hints while the candidate types
+    now = time.monotonic()
+    if now - session.get('lastDraftHint', 0) >= DRAFT_HINT_INTERVAL:
+        session['lastDraftHint'] = now
+        emit('answer-draft-metrics', {'metrics': draft.metrics()})
+
+@socketio.on('request-progress')
+def handle_request_progress():
+    session = current_session()
+    if session:
+        # Constant-time summary so far, read from the running aggregates
+        emit('interview-progress', session['interviewer'].get_progress())
 
 @socketio.on('request-feedback')
-def handle_request_feedback():
-    session = interview_sessions.get(request.sid)
-    if session and session.get('status') == 'completed':
+@rate_limited('request-feedback')
+def handle_request_feedback(data=None):
+    session = current_session()
+    if not session or session.get('status') != 'completed':
+        return
+    
+    if not data or 'page' not in data:
         emit('interview-feedback', session['summary'])
+        return
+    
+    # Detailed feedback is sent a page at a time, only when asked for
+    page = data['page']
+    if not isinstance(page, int) or isinstance(page, bool) or page < 0:
+        emit('error', {'message': 'Feedback page must be a non-negative integer.'})
+        return
+    emit('interview-feedback-page', session['interviewer'].get_feedback_page(page))
 
 if __name__ == '__main__':
     print("🚀 Starting AI Interview System...")
     print("📱 Open http://localhost:5000 in your browser")
     print("🤖 AI Interview System is ready!")
     
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True)
+    # The reloader runs the app again in a child process, which could not
+    # open the interview log this process holds
+    socketio.run(app, host='0.0.0.0', port=5000, debug=True, use_reloader=interview_log is None)
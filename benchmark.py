@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+AI Interview Platform Benchmark Script
+Times every stage of the ai_engine scoring pipeline on synthetic answers
+and compares the results against a stored baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import timeit
+from datetime import datetime
+
+from ai_engine import AdvancedAIEngine, AIInterviewer, INDICATOR_PHRASES, iter_text_chunks
+from analysis_cache import AnalysisCache
+
+DEFAULT_SIZES = [20, 100, 1000, 10000, 50000]
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+
+FILLER_WORDS = [
+    'the', 'team', 'and', 'we', 'then', 'our', 'system', 'project', 'work', 'with',
+    'to', 'of', 'a', 'in', 'was', 'that', 'for', 'on', 'it', 'approach', 'data',
+    'users', 'process', 'release', 'quality', 'review', 'design', 'build', 'plan'
+]
+SPECIFIC_TOKENS = ['40%', '3 years', '$500', '2000 users', 'v2.1', 'AWS', 'John Smith', '12 projects']
+LIST_TOKENS = ['\n- ', '\n1. ', '\n* ']
+
+def make_answer(role, size, rng, engine):
+    """Build a deterministic synthetic answer of roughly size words for a role"""
+    vocabulary = list(FILLER_WORDS)
+    role_data = engine.knowledge_base.get(role)
+    if role_data:
+        for key in ('concepts', 'technologies', 'skills'):
+            vocabulary.extend(role_data[key])
+    indicators = [phrase for phrases in INDICATOR_PHRASES.values() for phrase in phrases]
+    
+    words = []
+    while len(words) < size:
+        roll = rng.random()
+        if roll < 0.65:
+            words.append(rng.choice(vocabulary))
+        elif roll < 0.85:
+            words.append(rng.choice(indicators))
+        elif roll < 0.93:
+            words.append(rng.choice(SPECIFIC_TOKENS))
+        elif roll < 0.97:
+            words.append(rng.choice(LIST_TOKENS))
+        else:
+            words[-1:] = [(words[-1] if words else 'done') + '.']
+    return ' '.join(words[:size])
+
+def time_call(func, repeat, min_time):
+    """Per-call timings in microseconds: best and median of repeat runs"""
+    timer = timeit.Timer(func)
+    if min_time is None:
+        number, _ = timer.autorange()
+    else:
+        # Grow the loop count until one run takes at least min_time seconds
+        number = 1
+        while timer.timeit(number) < min_time:
+            number *= 2
+    runs = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {'best_us': min(runs), 'median_us': statistics.median(runs), 'loops': number}
+
+def build_cases(engine, cached_engine, role, answer, question, history_size):
+    """Benchmark cases for one answer: name -> zero-argument callable"""
+    processed = engine._preprocess_text(answer)
+    metrics = engine.analyze_answer_sophistication(answer, question, role)
+    cached_engine.generate_intelligent_score(answer, question, role)
+    
+    interviewer = AIInterviewer(role, engine)
+    for question_number in range(history_size):
+        next_question = interviewer.get_next_question() or {'question': question}
+        interviewer.evaluate_answer(answer, next_question['question'])
+    
+    batch = [answer] * 100
+    
+    return {
+        '_preprocess_text': lambda: engine._preprocess_text(answer),
+        '_calculate_length_score': lambda: engine._calculate_length_score(answer),
+        '_calculate_vocabulary_score': lambda: engine._calculate_vocabulary_score(processed),
+        '_calculate_technical_relevance': lambda: engine._calculate_technical_relevance(processed, role),
+        '_calculate_structure_score': lambda: engine._calculate_structure_score(answer),
+        '_calculate_sentiment_score': lambda: engine._calculate_sentiment_score(answer),
+        '_calculate_specificity_score': lambda: engine._calculate_specificity_score(answer),
+        '_calculate_example_score': lambda: engine._calculate_example_score(answer),
+        '_calculate_impact_score': lambda: engine._calculate_impact_score(answer),
+        '_calculate_reference_similarity': lambda: engine._calculate_reference_similarity(processed, question, role),
+        'analyze_answer_sophistication': lambda: engine.analyze_answer_sophistication(answer, question, role),
+        'analyze_answer_stream': lambda: engine.analyze_answer_stream(iter_text_chunks(answer), question, role),
+        'generate_intelligent_score': lambda: engine.generate_intelligent_score(answer, question, role),
+        'generate_intelligent_score_cached': lambda: cached_engine.generate_intelligent_score(answer, question, role),
+        'generate_intelligent_feedback': lambda: engine.generate_intelligent_feedback(answer, question, role, metrics),
+        'analyze_many_x100': lambda: engine.analyze_many(batch, question, role),
+        'get_interview_summary': interviewer.get_interview_summary
+    }
+
+def run_benchmarks(sizes, roles, repeat, min_time, history_size, seed, only=None):
+    """Run every case for every role and size; returns a list of result rows"""
+    # Uncached, so repeated runs measure the analysis itself; the cached case
+    # measures a hit on the analysis cache
+    engine = AdvancedAIEngine()
+    cached_engine = AdvancedAIEngine(analysis_cache=AnalysisCache())
+    results = []
+    for role in roles:
+        for size in sizes:
+            rng = random.Random(f'{seed}:{role}:{size}')
+            answer = make_answer(role, size, rng, engine)
+            question = f'Synthetic {role} question'
+            cases = build_cases(engine, cached_engine, role, answer, question, history_size)
+            for name, func in cases.items():
+                if only and name not in only:
+                    continue
+                timing = time_call(func, repeat, min_time)
+                results.append(dict(case=name, role=role, words=size, chars=len(answer), **timing))
+                print(f"  {role:<20} {size:>6} words  {name:<32} {timing['best_us']:>12.1f} us")
+    return results
+
+def result_key(row):
+    return f"{row['case']}|{row['role']}|{row['words']}"
+
+def compare_with_baseline(results, baseline, threshold):
+    """Rows whose best time is more than threshold times the baseline best time"""
+    baseline_rows = {result_key(row): row for row in baseline['results']}
+    regressions = []
+    for row in results:
+        previous = baseline_rows.get(result_key(row))
+        if previous and previous['best_us'] > 0:
+            ratio = row['best_us'] / previous['best_us']
+            row['baseline_best_us'] = previous['best_us']
+            row['ratio'] = ratio
+            if ratio > threshold:
+                regressions.append(row)
+    return regressions
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Benchmark the ai_engine scoring pipeline')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='answer sizes in words')
+    parser.add_argument('--roles', nargs='+', help='roles to benchmark (default: every role plus general)')
+    parser.add_argument('--cases', nargs='+', help='only run these cases')
+    parser.add_argument('--repeat', type=int, default=5, help='timing runs per case')
+    parser.add_argument('--min-time', type=float, help='minimum seconds per timing run (default: timeit autorange)')
+    parser.add_argument('--history', type=int, default=10, help='answers in the interview used for get_interview_summary')
+    parser.add_argument('--seed', type=int, default=42, help='seed for the synthetic answers')
+    parser.add_argument('--quick', action='store_true', help='small sizes and few runs, for a smoke check')
+    parser.add_argument('--output', help='write JSON results to this file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON to compare against, if it exists')
+    parser.add_argument('--save-baseline', action='store_true', help='also write the results to the baseline file')
+    parser.add_argument('--threshold', type=float, default=1.25, help='slowdown ratio reported as a regression')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.quick:
+        args.sizes = [size for size in args.sizes if size <= 1000]
+        args.repeat = 3
+    roles = args.roles or list(AdvancedAIEngine().knowledge_base.keys()) + ['general']
+    
+    print("⏱️  AI Engine Benchmark")
+    print("=" * 50)
+    results = run_benchmarks(args.sizes, roles, args.repeat, args.min_time, args.history, args.seed, args.cases)
+    
+    report = {
+        'created': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'sizes': args.sizes, 'roles': roles, 'repeat': args.repeat, 'history': args.history, 'seed': args.seed},
+        'results': results
+    }
+    
+    exit_code = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as fh:
+            baseline = json.load(fh)
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        report['baseline'] = {'path': args.baseline, 'created': baseline.get('created'), 'threshold': args.threshold}
+        report['regressions'] = [result_key(row) for row in regressions]
+        print("\n📊 Compared with baseline from", baseline.get('created'))
+        for row in regressions:
+            print(f"  ❌ {result_key(row)}: {row['ratio']:.2f}x slower ({row['baseline_best_us']:.1f} -> {row['best_us']:.1f} us)")
+        if regressions:
+            exit_code = 1
+        else:
+            print(f"  ✅ No case slower than {args.threshold:.2f}x baseline")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+    
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+AI Interview Platform Bulk Grading Script
+Scores a JSONL or CSV stream of (role, question, answer) records on a process
+pool and writes the results in input order, resuming from a checkpoint if a
+previous run was interrupted
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from ai_engine import METRIC_KEYS, analyze_answer
+
+CHECKPOINT_VERSION = 1
+CSV_FIELDS = ['index', 'id', 'role', 'question', 'score'] + list(METRIC_KEYS) + ['feedback', 'followUp', 'error']
+
+def read_records(handle, input_format):
+    """Yield input records as dicts, one at a time"""
+    if input_format == 'csv':
+        yield from csv.DictReader(handle)
+        return
+    for line_number, line in enumerate(handle, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            record = {'error': f'line {line_number}: invalid JSON ({e})'}
+        yield record if isinstance(record, dict) else {'error': f'line {line_number}: expected a JSON object'}
+
+def grade_batch(start_index, records, seed=None):
+    """Score consecutive records; runs in a worker process"""
+    results = []
+    for index, record in enumerate(records, start_index):
+        result = {'index': index, 'id': record.get('id'), 'role': record.get('role') or 'general',
+                  'question': record.get('question') or ''}
+        answer = record.get('answer')
+        if record.get('error'):
+            result['error'] = record['error']
+        elif not isinstance(answer, str) or not answer.strip():
+            result['error'] = 'missing answer'
+        else:
+            if seed is not None:
+                # Follow-up questions are picked at random; seeding per record
+                # keeps reruns identical whichever worker grades it
+                random.seed(f'{seed}:{index}')
+            try:
+                score, metrics, feedback, follow_up = analyze_answer(answer, result['question'], result['role'])
+            except Exception as e:
+                result['error'] = f'{type(e).__name__}: {e}'
+            else:
+                result.update(score=score, metrics=metrics, feedback=feedback, followUp=follow_up)
+        results.append(result)
+    return results
+
+def format_result(result, output_format):
+    """Encode one result as a line of the output file"""
+    if output_format == 'jsonl':
+        return (json.dumps(result, ensure_ascii=False) + '\n').encode('utf-8')
+    row = dict(result)
+    row.update(row.pop('metrics', None) or {})
+    buffer = io.StringIO()
+    csv.DictWriter(buffer, CSV_FIELDS, extrasaction='ignore').writerow(row)
+    return buffer.getvalue().encode('utf-8')
+
+def csv_header():
+    buffer = io.StringIO()
+    csv.DictWriter(buffer, CSV_FIELDS).writeheader()
+    return buffer.getvalue().encode('utf-8')
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as fh:
+        checkpoint = json.load(fh)
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"{path} was written by an incompatible version")
+    return checkpoint
+
+def save_checkpoint(path, output, records_done, settings):
+    """Make output durable up to its current size, then record how far it got"""
+    output.flush()
+    os.fsync(output.fileno())
+    checkpoint = {'version': CHECKPOINT_VERSION, 'records': records_done, 'offset': output.tell(), 'settings': settings}
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'w', encoding='utf-8') as fh:
+        json.dump(checkpoint, fh)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(temporary_path, path)
+
+def iter_batches(records, batch_size, start_index):
+    index = start_index
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield index, batch
+        index += len(batch)
+
+def grade_stream(batches, output, output_format, workers, seed, on_batch):
+    """Grade record batches in parallel and write results in input order"""
+    # At most two batches per worker are pending, so memory stays bounded
+    # however long the input is; the head batch is written as soon as it is
+    # done even if later ones finished first.
+    if workers == 0:
+        for start_index, batch in batches:
+            for result in grade_batch(start_index, batch, seed):
+                output.write(format_result(result, output_format))
+            on_batch(len(batch))
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start_index, batch in batches:
+            pending.append((len(batch), executor.submit(grade_batch, start_index, batch, seed)))
+            while len(pending) >= workers * 2:
+                write_head(pending, output, output_format, on_batch)
+        while pending:
+            write_head(pending, output, output_format, on_batch)
+
+def write_head(pending, output, output_format, on_batch):
+    count, future = pending.popleft()
+    for result in future.result():
+        output.write(format_result(result, output_format))
+    on_batch(count)
+
+def detect_format(path, requested):
+    if requested:
+        return requested
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Grade archived interview answers in bulk')
+    parser.add_argument('input', help="JSONL or CSV file with role, question and answer fields ('-' for stdin)")
+    parser.add_argument('output', help='JSONL or CSV file to write results to')
+    parser.add_argument('--input-format', choices=['jsonl', 'csv'], help='default: from the file extension')
+    parser.add_argument('--output-format', choices=['jsonl', 'csv'], help='default: from the file extension')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='grading processes (0 grades in this process)')
+    parser.add_argument('--batch-size', type=int, default=32, help='records sent to a worker at a time')
+    parser.add_argument('--checkpoint', help='checkpoint file (default: OUTPUT.checkpoint)')
+    parser.add_argument('--checkpoint-every', type=int, default=1000, help='records between checkpoints')
+    parser.add_argument('--resume', action='store_true', help='continue from the checkpoint of an interrupted run')
+    parser.add_argument('--seed', type=int, help='make follow-up questions reproducible')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    input_format = detect_format(args.input, args.input_format)
+    output_format = detect_format(args.output, args.output_format)
+    checkpoint_path = args.checkpoint or f'{args.output}.checkpoint'
+    settings = {'input': args.input, 'inputFormat': input_format, 'outputFormat': output_format, 'seed': args.seed}
+    
+    checkpoint = load_checkpoint(checkpoint_path) if args.resume else None
+    if checkpoint is not None and checkpoint['settings'] != settings:
+        print(f"❌ {checkpoint_path} belongs to a run with different settings", file=sys.stderr)
+        return 2
+    
+    if checkpoint is not None:
+        # Drop whatever was written after the last checkpoint; those records
+        # are graded again
+        output = open(args.output, 'r+b')
+        output.truncate(checkpoint['offset'])
+        output.seek(checkpoint['offset'])
+        records_done = checkpoint['records']
+        print(f"↩️  Resuming after {records_done} records", file=sys.stderr)
+    else:
+        output = open(args.output, 'wb')
+        records_done = 0
+        if output_format == 'csv':
+            output.write(csv_header())
+    
+    if args.input == '-':
+        source = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+    else:
+        source = open(args.input, 'r', encoding='utf-8', newline='')
+    
+    started = time.monotonic()
+    progress = {'done': records_done, 'since_checkpoint': 0}
+    
+    def on_batch(count):
+        progress['done'] += count
+        progress['since_checkpoint'] += count
+        if progress['since_checkpoint'] >= args.checkpoint_every:
+            progress['since_checkpoint'] = 0
+            save_checkpoint(checkpoint_path, output, progress['done'], settings)
+            rate = (progress['done'] - records_done) / max(time.monotonic() - started, 1e-9)
+            print(f"  {progress['done']} records graded ({rate:.0f}/s)", file=sys.stderr)
+    
+    with source, output:
+        records = islice(read_records(source, input_format), records_done, None)
+        batches = iter_batches(records, args.batch_size, records_done)
+        grade_stream(batches, output, output_format, args.workers, args.seed, on_batch)
+        save_checkpoint(checkpoint_path, output, progress['done'], settings)
+    
+    elapsed = time.monotonic() - started
+    print(f"✅ Graded {progress['done'] - records_done} records in {elapsed:.1f}s; results in {args.output}",
+          file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""Near-duplicate detection of answers across interviews.
+
+An answer is reduced to the set of its word 3-grams (shingles) and
+summarized by a MinHash signature, whose positions agree between two
+answers with probability equal to the Jaccard similarity of their shingle
+sets. Signatures use one-permutation hashing: every shingle is hashed once
+into one of num_perm bins that each keep their minimum, and empty bins are
+filled from the next non-empty bin (densification). A signature costs one
+hash per shingle instead of num_perm, and more text can be added to it at
+any time.
+
+DuplicateIndex stores signatures in SQLite with an LSH banding index: the
+signature is cut into bands and each band's hash is a key in an indexed
+table. Answers sharing any band are the only candidates compared with the
+new one, so a lookup is one indexed query per band however many answers
+are stored. With 16 bands of 8 rows, answers with a Jaccard similarity of
+0.8 share a band 95% of the time and answers at 0.4 under 1%.
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import namedtuple
+from itertools import islice
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 16
+# Estimated Jaccard similarity above which an answer is a near-duplicate
+DEFAULT_THRESHOLD = 0.8
+
+SHINGLE_WORDS = 3
+# Answers with fewer words are too generic to call copied
+MIN_WORDS = 20
+# Only the start of very long answers is signed, which keeps signing in
+# the low milliseconds
+MAX_WORDS = 5000
+# Candidates compared with a new answer at most, for answers (such as a
+# popular dump) that share their bands with very many others
+MAX_CANDIDATES = 256
+# Answers kept at most and for how many seconds; each is about 1 KB stored.
+# The oldest are pruned first, once every PRUNE_INTERVAL seconds, so copies
+# are caught within that window.
+DEFAULT_MAX_ANSWERS = 200000
+DEFAULT_MAX_AGE = 90 * 24 * 60 * 60
+# Seconds between prunes
+PRUNE_INTERVAL = 60.0
+
+WORD = re.compile(r'[a-z0-9]+')
+
+VALUE_MASK = (1 << 32) - 1
+EMPTY_BIN = 1 << 32
+# Added per bin skipped when an empty bin borrows a later bin's value
+DENSIFY_STEP = 0x9E3779B1
+
+DuplicateMatch = namedtuple('DuplicateMatch', ['similarity', 'matches'])
+
+def answer_words(text, max_words=MAX_WORDS):
+    """Lowercased words of text, up to max_words of them"""
+    return [match.group() for match in islice(WORD.finditer(text.lower()), max_words)]
+
+def shingle_hashes(words):
+    """64-bit hashes of the distinct word 3-grams of a word list"""
+    if len(words) < SHINGLE_WORDS:
+        shingles = [' '.join(words)] if words else []
+    else:
+        shingles = (' '.join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1))
+    return {
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        for shingle in shingles
+    }
+
+class MinHash:
+    """One-permutation MinHash signature, updatable as more shingles arrive"""
+    
+    __slots__ = ('num_perm', 'bins')
+    
+    def __init__(self, num_perm=DEFAULT_NUM_PERM):
+        self.num_perm = num_perm
+        self.bins = [EMPTY_BIN] * num_perm
+    
+    def update(self, hashes):
+        """Add shingle hashes (see shingle_hashes)"""
+        bins = self.bins
+        num_perm = self.num_perm
+        for value in hashes:
+            position = value % num_perm
+            value = (value // num_perm) & VALUE_MASK
+            if value < bins[position]:
+                bins[position] = value
+    
+    def merge(self, other):
+        """Fold in the signature of more text from the same answer"""
+        self.bins = [min(mine, theirs) for mine, theirs in zip(self.bins, other.bins)]
+    
+    def is_empty(self):
+        return all(value == EMPTY_BIN for value in self.bins)
+    
+    def digest(self):
+        """Densified signature values; raises ValueError when nothing was added"""
+        bins = self.bins
+        count = self.num_perm
+        if self.is_empty():
+            raise ValueError("Cannot digest an empty MinHash")
+        values = array('I', [0]) * count
+        for position in range(count):
+            skipped = 0
+            value = bins[position]
+            while value == EMPTY_BIN:
+                skipped += 1
+                value = bins[(position + skipped) % count]
+            values[position] = (value + skipped * DENSIFY_STEP) & VALUE_MASK
+        return values
+
+def estimate_jaccard(first, second):
+    """Estimated Jaccard similarity of two digests"""
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+class DuplicateIndex:
+    """LSH index of answer signatures in a SQLite file (':memory:' keeps it in memory)
+    
+    Answers older than max_age seconds, and the oldest beyond max_answers,
+    are pruned as new ones are added; None keeps them.
+    """
+    
+    def __init__(self, path=':memory:', num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS,
+                 threshold=DEFAULT_THRESHOLD, max_answers=DEFAULT_MAX_ANSWERS, max_age=DEFAULT_MAX_AGE):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.max_answers = max_answers
+        self.max_age = max_age
+        self.lookups = 0
+        self.duplicates = 0
+        self.pruned = 0
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        # WAL commits stay consistent without an fsync each; at worst the
+        # last few answers are missing from the index after a power loss
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS duplicate_index_settings (name TEXT PRIMARY KEY, value INTEGER NOT NULL)'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS answer_signatures ('
+            'id INTEGER PRIMARY KEY, owner TEXT NOT NULL, added REAL NOT NULL, signature BLOB NOT NULL)'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS answer_bands ('
+            'band_key INTEGER NOT NULL, answer_id INTEGER NOT NULL, '
+            'PRIMARY KEY (band_key, answer_id)) WITHOUT ROWID'
+        )
+        # Pruning finds the oldest answers by when they were added, and their bands by id
+        self._db.execute('CREATE INDEX IF NOT EXISTS answer_signatures_added ON answer_signatures (added)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS answer_bands_answer ON answer_bands (answer_id)')
+        self._check_settings()
+    
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM answer_signatures').fetchone()[0]
+    
+    def signature(self, text):
+        """Digest of an answer's MinHash, or None for answers under MIN_WORDS words"""
+        words = answer_words(text)
+        if len(words) < MIN_WORDS:
+            return None
+        minhash = MinHash(self.num_perm)
+        minhash.update(shingle_hashes(words))
+        return minhash.digest()
+    
+    def check(self, owner, text):
+        """Look an answer up, then add it under owner (e.g. its interview's id)
+        
+        Returns a DuplicateMatch for the most similar earlier answer of
+        another owner at or above the threshold, or None. Short answers are
+        neither looked up nor added.
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        match = self.query(signature, owner)
+        self.add(owner, signature)
+        return match
+    
+    def query(self, signature, exclude_owner=None):
+        """DuplicateMatch of the closest stored answer not from exclude_owner, or None"""
+        keys = self._band_keys(signature)
+        with self._lock:
+            self.lookups += 1
+            # The owner's own answers are left out before the limit, so they
+            # can never crowd out another interview's
+            candidates = self._db.execute(
+                'SELECT signature FROM answer_signatures WHERE id IN ('
+                f'SELECT answer_id FROM answer_bands WHERE band_key IN ({",".join("?" * len(keys))})'
+                ') AND owner IS NOT ? LIMIT ?', keys + [exclude_owner, MAX_CANDIDATES]
+            ).fetchall()
+        
+        similarities = []
+        for (stored,) in candidates:
+            similarity = estimate_jaccard(signature, array('I', stored))
+            if similarity >= self.threshold:
+                similarities.append(similarity)
+        if not similarities:
+            return None
+        with self._lock:
+            self.duplicates += 1
+        return DuplicateMatch(max(similarities), len(similarities))
+    
+    def add(self, owner, signature):
+        """Store a signature and its band keys"""
+        keys = self._band_keys(signature)
+        now = time.time()
+        with self._lock:
+            self._db.execute('BEGIN')
+            try:
+                answer_id = self._db.execute(
+                    'INSERT INTO answer_signatures (owner, added, signature) VALUES (?, ?, ?)',
+                    (owner, now, signature.tobytes())
+                ).lastrowid
+                self._db.executemany(
+                    'INSERT OR IGNORE INTO answer_bands (band_key, answer_id) VALUES (?, ?)',
+                    [(key, answer_id) for key in keys]
+                )
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+        if now >= self._next_prune:
+            self._next_prune = now + PRUNE_INTERVAL
+            self.prune(now)
+        return answer_id
+    
+    def prune(self, now=None):
+        """Drop answers older than max_age and the oldest beyond max_answers; returns how many"""
+        now = time.time() if now is None else now
+        with self._lock:
+            # Everything added before the cutoff goes
+            cutoff = now - self.max_age if self.max_age is not None else None
+            if self.max_answers is not None:
+                row = self._db.execute(
+                    'SELECT added FROM answer_signatures ORDER BY added DESC LIMIT 1 OFFSET ?',
+                    (self.max_answers - 1,)
+                ).fetchone()
+                if row is not None and (cutoff is None or row[0] > cutoff):
+                    cutoff = row[0]
+            if cutoff is None:
+                return 0
+            
+            self._db.execute('BEGIN')
+            try:
+                self._db.execute(
+                    'DELETE FROM answer_bands WHERE answer_id IN (SELECT id FROM answer_signatures WHERE added < ?)',
+                    (cutoff,)
+                )
+                count = self._db.execute('DELETE FROM answer_signatures WHERE added < ?', (cutoff,)).rowcount
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self.pruned += count
+        return count
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+    
+    def _band_keys(self, signature):
+        """One signed 64-bit key per band, unique to the band's position and values"""
+        rows = self.rows
+        keys = []
+        for band in range(self.bands):
+            values = signature[band * rows:(band + 1) * rows]
+            digest = hashlib.blake2b(values.tobytes(), digest_size=8, person=band.to_bytes(2, 'little')).digest()
+            keys.append(int.from_bytes(digest, 'little', signed=True))
+        return keys
+    
+    def _check_settings(self):
+        """Refuse a file written with another signature layout"""
+        settings = {'num_perm': self.num_perm, 'bands': self.bands}
+        with self._lock:
+            stored = dict(self._db.execute('SELECT name, value FROM duplicate_index_settings'))
+            if not stored:
+                self._db.executemany(
+                    'INSERT OR IGNORE INTO duplicate_index_settings (name, value) VALUES (?, ?)',
+                    settings.items()
+                )
+            elif stored != settings:
+                raise ValueError(f"Duplicate index was built with {stored}, not {settings}")
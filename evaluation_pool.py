@@ -0,0 +1,140 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# Weight of the newest evaluation in the running average of evaluation time
+SERVICE_TIME_SMOOTHING = 0.2
+
+def timed_call(fn, args):
+    """fn(*args) and the seconds it took; module-level so process workers can run it"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+class EvaluationPool:
+    """Runs answer evaluations off the Socket.IO handler threads"""
+    
+    BACKENDS = ('thread', 'process', 'inline')
+    
+    def __init__(self, backend='thread', max_workers=4, max_queue=64, timeout=10.0, max_wait=None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown evaluation backend '{backend}', expected one of {self.BACKENDS}")
+        
+        self.backend = backend
+        self.timeout = timeout
+        self.max_workers = max_workers
+        # Submissions expected to wait longer than this for a worker are
+        # rejected at once rather than queued (None: only when full)
+        self.max_wait = max_wait
+        # Running average of how long one evaluation takes, once known
+        self.service_seconds = None
+        self.rejected = 0
+        if backend == 'thread':
+            self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='evaluation')
+        elif backend == 'process':
+            # CPU-bound scoring scales past the GIL; tasks must be picklable
+            self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            self.executor = None
+        
+        # Running plus queued tasks; submissions beyond this are rejected
+        self.capacity = max_workers + max_queue
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+    
+    def submit(self, fn, args, on_done, on_degraded):
+        """Run fn(*args), then on_done(result) or on_degraded() on timeout or error"""
+        # Exactly one callback runs, on a pool or timer thread. Returns False
+        # without running anything when the queue is full or the wait for a
+        # worker would exceed max_wait; retry_after() says when to try again.
+        if self.max_wait is not None and self.expected_wait() > self.max_wait:
+            return self._reject()
+        if not self._slots.acquire(blocking=False):
+            return self._reject()
+        with self._lock:
+            self.in_flight += 1
+        
+        if self.executor is None:
+            try:
+                result, seconds = timed_call(fn, args)
+            except Exception:
+                self._release()
+                on_degraded()
+                return True
+            self._release(seconds)
+            on_done(result)
+            return True
+        
+        settled = []
+        settle_lock = threading.Lock()
+        
+        def settle():
+            # True for whichever of completion and timeout gets here first
+            with settle_lock:
+                if settled:
+                    return False
+                settled.append(True)
+                return True
+        
+        def expire():
+            if settle():
+                future.cancel()
+                on_degraded()
+        
+        def finished(future):
+            if timer is not None:
+                timer.cancel()
+            failed = future.cancelled() or future.exception() is not None
+            result, seconds = (None, None) if failed else future.result()
+            self._release(seconds)
+            if future.cancelled() or not settle():
+                return
+            if failed:
+                on_degraded()
+            else:
+                on_done(result)
+        
+        timer = threading.Timer(self.timeout, expire) if self.timeout else None
+        future = self.executor.submit(timed_call, fn, args)
+        future.add_done_callback(finished)
+        if timer is not None:
+            # A timer cancelled before it starts exits immediately
+            timer.daemon = True
+            timer.start()
+        return True
+    
+    def queue_depth(self):
+        """Number of evaluations running or waiting for a worker"""
+        return self.in_flight
+    
+    def expected_wait(self):
+        """Seconds a submission made now would wait for a worker, from the recent evaluation time"""
+        waiting = self.in_flight - self.max_workers + 1
+        if waiting <= 0 or self.service_seconds is None:
+            return 0.0
+        return waiting * self.service_seconds / self.max_workers
+    
+    def retry_after(self):
+        """Seconds after which a rejected submission is likely to be accepted"""
+        return max(self.expected_wait(), self.service_seconds or 0.0)
+    
+    def shutdown(self, wait=True):
+        """Stop accepting work and release the workers"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+    
+    def _reject(self):
+        with self._lock:
+            self.rejected += 1
+        return False
+    
+    def _release(self, seconds=None):
+        with self._lock:
+            self.in_flight -= 1
+            if seconds is not None:
+                if self.service_seconds is None:
+                    self.service_seconds = seconds
+                else:
+                    self.service_seconds += SERVICE_TIME_SMOOTHING * (seconds - self.service_seconds)
+        self._slots.release()
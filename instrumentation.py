@@ -0,0 +1,225 @@
+import sys
+import time
+import threading
+from collections import Counter as StackCounter
+from functools import wraps
+
+# Latency buckets in seconds, from sub-millisecond scoring up to slow evaluations
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """Base for metrics exposed in the Prometheus text format"""
+    
+    kind = 'untyped'
+    
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+    
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return lines
+    
+    def _samples(self):
+        raise NotImplementedError
+
+class Counter(Metric):
+    """Monotonic count, optionally split by label values or read from a callback"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name, help_text, labels=(), callback=None):
+        super().__init__(name, help_text, labels)
+        self.callback = callback
+        self._values = {}
+    
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+    
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+    
+    def _samples(self):
+        if self.callback is not None:
+            return [f'{self.name} {_format_value(self.callback())}']
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}' for key, value in items]
+
+class Gauge(Metric):
+    """Current value, either set directly or read from a callback at scrape time"""
+    
+    kind = 'gauge'
+    
+    def __init__(self, name, help_text, callback=None):
+        super().__init__(name, help_text)
+        self.callback = callback
+        self._value = 0
+    
+    def set(self, value):
+        self._value = value
+    
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+    
+    def dec(self, amount=1):
+        self.inc(-amount)
+    
+    def value(self):
+        return self.callback() if self.callback is not None else self._value
+    
+    def _samples(self):
+        return [f'{self.name} {_format_value(self.value())}']
+
+class Histogram(Metric):
+    """Cumulative bucket histogram of observed values, optionally split by label values"""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}
+    
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+    
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+    
+    def _samples(self):
+        lines = []
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ('le', _format_value(bound)))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.label_names, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+class Registry:
+    """Collection of metrics rendered together on the /metrics route"""
+    
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = []
+    
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+    
+    def counter(self, name, help_text, labels=(), callback=None):
+        return self.register(Counter(name, help_text, labels, callback))
+    
+    def gauge(self, name, help_text, callback=None):
+        return self.register(Gauge(name, help_text, callback))
+    
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+    
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+    
+    def timed(self, histogram, *label_values):
+        """Decorator recording the wrapped call's duration; a flag check when disabled"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start, *label_values)
+            return wrapper
+        return decorator
+
+class SamplingProfiler:
+    """Samples one thread's stack at a fixed interval while active"""
+    
+    # Used as a context manager around a single request. Results are folded
+    # stacks ("outer;inner;leaf count" lines) that flame graph tools read.
+    
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.samples = StackCounter()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        return False
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({code.co_filename.rsplit("/", 1)[-1]}:{frame.f_lineno})')
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+    
+    def folded(self):
+        """Samples as folded stack lines, most frequent first"""
+        return '\n'.join(f'{stack} {count}' for stack, count in self.samples.most_common())
+
+def profiled_call(func, args, path, interval=0.005):
+    """Call func(*args) under a SamplingProfiler and write its folded stacks to path"""
+    # Module level so it can wrap tasks sent to a process pool
+    profiler = SamplingProfiler(interval)
+    try:
+        with profiler:
+            return func(*args)
+    finally:
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(profiler.folded() + '\n')
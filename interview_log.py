@@ -0,0 +1,312 @@
+"""Durable, append-only log of interview events.
+
+With the in-memory session store every interview in progress is lost when
+the process stops. An interview log records each start, evaluation and
+completion, and on startup the interviews are rebuilt by replaying it so
+candidates can resume where they were.
+
+Each record is a header (payload length, CRC-32) followed by a JSON event.
+Appending only queues the encoded record; a writer thread writes whatever
+has been queued since its last write and fsyncs once for the whole batch
+(group commit), so no event handler waits for the disk. An event is durable
+a few milliseconds after it is appended; wait() blocks until it is.
+
+The log is written in numbered segments. A segment is closed when it
+reaches segment_bytes or has been open for compact_interval seconds, and
+closed segments are folded into a snapshot of the interviews they leave
+open, then deleted. A record cut short by a crash ends its segment and is
+ignored when the log is replayed.
+"""
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from session_store import session_state
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Payload length and CRC-32 of the payload
+RECORD_HEADER = struct.Struct('<II')
+
+SEGMENT_PREFIX = 'segment-'
+SEGMENT_SUFFIX = '.log'
+SNAPSHOT_NAME = 'snapshot.log'
+LOCK_NAME = 'lock'
+
+def encode_record(event):
+    """Frame an event as one log record"""
+    payload = json.dumps(event, separators=(',', ':')).encode('utf-8')
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+def read_records(path):
+    """Yield the events of a log file up to the first incomplete or corrupt record"""
+    with open(path, 'rb') as log_file:
+        while True:
+            header = log_file.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            length, checksum = RECORD_HEADER.unpack(header)
+            payload = log_file.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return
+            yield json.loads(payload)
+
+def apply_event(states, event):
+    """Fold an event into states, a dict of session id -> session_state() dict"""
+    session_id = event['id']
+    if event['type'] == 'start':
+        states[session_id] = state = event['session']
+    else:
+        state = states.get(session_id)
+        if state is None:
+            # Started before the snapshot and dropped from it as expired
+            return
+        if event['type'] == 'answer':
+            state['interview']['history'].append(event['record'])
+            state['interview'].update(event['position'])
+            state['currentQuestion'] = event['question']
+        elif event['type'] == 'complete':
+            state['status'] = 'completed'
+            state['endTime'] = event['endTime']
+            state['summary'] = event['summary']
+    state['updated'] = event['time']
+
+class InterviewLog:
+    """Append-only interview event log in a directory owned by one process"""
+    
+    def __init__(self, directory, segment_bytes=64 * 1024 * 1024, compact_interval=300.0,
+                 retention=24 * 60 * 60):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compact_interval = compact_interval
+        # Interviews with no event for this many seconds are not kept
+        self.retention = retention
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = self._lock_directory()
+        
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        self._done = threading.Condition(self._lock)
+        self._pending = []
+        self._appended = 0
+        self._committed = 0
+        self._closed = False
+        self.error = None
+        
+        # Replay everything and start from a fresh snapshot, so the next
+        # startup only reads what was written after this one
+        segments = self._segments()
+        self._recovered = self._load(segments)
+        self._segment = segments[-1] + 1 if segments else 1
+        self._write_snapshot(self._recovered, self._segment - 1)
+        self._remove_segments(segments)
+        
+        self._open_segment()
+        self._compactor = None
+        self._writer = threading.Thread(target=self._run, name='interview-log-writer', daemon=True)
+        self._writer.start()
+    
+    def recover(self):
+        """Interviews replayed on startup, as session id -> session_state() dicts
+        
+        Each state also has the question the candidate was last asked under
+        'currentQuestion'. The dict is handed over once; later calls return {}.
+        """
+        recovered, self._recovered = self._recovered, {}
+        return recovered
+    
+    def log_start(self, session, question):
+        return self.append({
+            'type': 'start',
+            'id': session['id'],
+            'session': dict(session_state(session), currentQuestion=question)
+        })
+    
+    def log_answer(self, session, question):
+        """Record the interview's latest evaluation and the question asked next"""
+        interviewer = session['interviewer']
+        return self.append({
+            'type': 'answer',
+            'id': session['id'],
+            'record': interviewer.interview_history[-1].to_state(),
+            'position': interviewer.position_state(),
+            'question': question
+        })
+    
+    def log_completion(self, session):
+        return self.append({
+            'type': 'complete',
+            'id': session['id'],
+            'endTime': session['endTime'].isoformat(),
+            'summary': session['summary']
+        })
+    
+    def append(self, event):
+        """Queue an event for the writer thread and return its sequence number"""
+        event['time'] = time.time()
+        record = encode_record(event)
+        with self._lock:
+            if self.error is not None:
+                raise RuntimeError(f"Interview log {self.directory} failed: {self.error}")
+            if self._closed:
+                raise RuntimeError(f"Interview log {self.directory} is closed")
+            self._pending.append(record)
+            self._appended += 1
+            self._work.notify()
+            return self._appended
+    
+    def wait(self, sequence=None, timeout=None):
+        """Block until the event with this sequence number (default: all appended) is on disk"""
+        with self._lock:
+            if sequence is None:
+                sequence = self._appended
+            return self._done.wait_for(
+                lambda: self._committed >= sequence or self.error is not None, timeout
+            ) and self.error is None
+    
+    def close(self):
+        """Write out every queued event and release the directory"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._work.notify()
+        self._writer.join()
+        if self._compactor is not None:
+            self._compactor.join()
+        self._file.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+    
+    def _run(self):
+        opened = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._pending and not self._closed:
+                    self._work.wait(self.compact_interval)
+                batch, self._pending = self._pending, []
+                sequence = self._appended
+                closed = self._closed
+            
+            if batch:
+                data = b''.join(batch)
+                try:
+                    self._file.write(data)
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                except OSError as error:
+                    with self._lock:
+                        self.error = error
+                        self._done.notify_all()
+                    return
+                self._size += len(data)
+                with self._lock:
+                    self._committed = sequence
+                    self._done.notify_all()
+            elif closed:
+                return
+            
+            if self._size >= self.segment_bytes or (
+                    self._size and time.monotonic() - opened >= self.compact_interval):
+                self._rotate()
+                opened = time.monotonic()
+    
+    def _rotate(self):
+        """Start a new segment and fold the closed ones into the snapshot"""
+        self._file.close()
+        closed_segment = self._segment
+        self._segment += 1
+        self._open_segment()
+        if self._compactor is None or not self._compactor.is_alive():
+            self._compactor = threading.Thread(
+                target=self._compact, args=(closed_segment,), name='interview-log-compactor', daemon=True
+            )
+            self._compactor.start()
+    
+    def _compact(self, through):
+        segments = [number for number in self._segments() if number <= through]
+        states = self._load(segments)
+        self._write_snapshot(states, through)
+        self._remove_segments(segments)
+    
+    def _load(self, segments):
+        """Replay the snapshot and then those segments it does not cover"""
+        states = {}
+        covered = 0
+        snapshot = os.path.join(self.directory, SNAPSHOT_NAME)
+        if os.path.exists(snapshot):
+            for event in read_records(snapshot):
+                if event['type'] == 'snapshot':
+                    covered = event['through']
+                else:
+                    apply_event(states, event)
+        for number in segments:
+            if number > covered:
+                for event in read_records(self._segment_path(number)):
+                    apply_event(states, event)
+        
+        expired = time.time() - self.retention
+        return {session_id: state for session_id, state in states.items() if state['updated'] >= expired}
+    
+    def _write_snapshot(self, states, through):
+        """Atomically replace the snapshot with states, covering segments up to through"""
+        path = os.path.join(self.directory, SNAPSHOT_NAME)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as snapshot:
+            snapshot.write(encode_record({'type': 'snapshot', 'through': through}))
+            for session_id, state in states.items():
+                snapshot.write(encode_record({
+                    'type': 'start', 'id': session_id, 'session': state, 'time': state['updated']
+                }))
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(temp_path, path)
+        self._sync_directory()
+    
+    def _segments(self):
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                numbers.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+        return sorted(numbers)
+    
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:08d}{SEGMENT_SUFFIX}")
+    
+    def _open_segment(self):
+        self._file = open(self._segment_path(self._segment), 'ab')
+        self._size = 0
+        self._sync_directory()
+    
+    def _remove_segments(self, segments):
+        for number in segments:
+            os.remove(self._segment_path(number))
+    
+    def _sync_directory(self):
+        """Make created, renamed and removed files durable"""
+        try:
+            descriptor = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            # Directories cannot be opened on some platforms (Windows)
+            return
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+    
+    def _lock_directory(self):
+        """Hold an exclusive lock so a second process cannot write the same log"""
+        if fcntl is None:
+            return None
+        lock_file = open(os.path.join(self.directory, LOCK_NAME), 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(f"Interview log {self.directory} is in use by another process")
+        return lock_file
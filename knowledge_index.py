@@ -0,0 +1,421 @@
+"""Compiled, memory-mapped knowledge base
+
+The source format is a directory with one JSON file per role
+(``<role>.json``) holding "concepts", "technologies", "skills" and
+"questions" lists. Questions are strings or {"text": ..., "tags": [...],
+"references": [...]} objects naming the metrics they probe and giving model
+answers to compare candidates' answers with. ``python knowledge_index.py compile SOURCE OUTPUT``
+turns it into a binary index that the engine memory-maps: opening it only
+reads the role directory, a role is decoded the first time it is used, and
+pre-forked workers share the mapped pages instead of each holding a copy.
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict, namedtuple
+from collections.abc import Mapping
+from types import MappingProxyType
+
+# Immutable per-role view of the knowledge base used for technical relevance:
+# vocab is every lowercased concept word, postings maps a word to the concepts
+# that contain it.
+RoleConceptIndex = namedtuple('RoleConceptIndex', ['vocab', 'postings', 'total_concept_words'])
+
+CONCEPT_FIELDS = ('concepts', 'technologies', 'skills')
+
+MAGIC = b'AIKB'
+FORMAT_VERSION = 3
+
+# magic, format version, reserved, role count, source digest, directory offset
+HEADER = struct.Struct('<4sHHI20sQ')
+# section offset, section length, concept count, role name length (name follows)
+DIRECTORY_ENTRY = struct.Struct('<QQIH')
+# Offsets of the concepts, technologies, skills, questions, vocab, postings,
+# question tags and question references tables, relative to the start of the
+# role section
+SECTION_HEADER = struct.Struct('<8I')
+# Separates the reference answers of one question in the references table
+REFERENCE_SEPARATOR = '\x1e'
+U32 = struct.Struct('<I')
+
+def build_concept_index(role_data):
+    """Build the concept index for one role of the knowledge base"""
+    role_concepts = role_data['concepts'] + role_data['technologies'] + role_data['skills']
+    
+    postings = {}
+    for concept in role_concepts:
+        for word in concept.lower().split():
+            concepts = postings.setdefault(word, [])
+            if concept not in concepts:
+                concepts.append(concept)
+    
+    return RoleConceptIndex(
+        vocab=frozenset(postings),
+        postings=MappingProxyType({word: tuple(concepts) for word, concepts in postings.items()}),
+        total_concept_words=len(postings)
+    )
+
+# Compiler
+
+def _pack_strings(strings):
+    """Count, end offsets and UTF-8 blob for a list of strings, padded to 4 bytes"""
+    encoded = [string.encode('utf-8') for string in strings]
+    ends = []
+    position = 0
+    for data in encoded:
+        position += len(data)
+        ends.append(position)
+    table = U32.pack(len(encoded)) + struct.pack(f'<{len(ends)}I', *ends) + b''.join(encoded)
+    return table + b'\0' * (-len(table) % 4)
+
+def _pack_postings(vocab, postings, concept_ids):
+    ends = []
+    ids = []
+    for word in vocab:
+        ids.extend(concept_ids[concept] for concept in postings[word])
+        ends.append(len(ids))
+    return (U32.pack(len(vocab)) + struct.pack(f'<{len(ends)}I', *ends)
+            + struct.pack(f'<{len(ids)}I', *ids))
+
+def _pack_role(role_data):
+    role_concepts = [concept for field in CONCEPT_FIELDS for concept in role_data[field]]
+    concept_ids = {}
+    for i, concept in enumerate(role_concepts):
+        concept_ids.setdefault(concept, i)
+    index = build_concept_index(role_data)
+    vocab = sorted(index.vocab)
+    
+    tables = [_pack_strings(role_data[field]) for field in CONCEPT_FIELDS]
+    tables.append(_pack_strings(role_data['questions']))
+    tables.append(_pack_strings(vocab))
+    tables.append(_pack_postings(vocab, index.postings, concept_ids))
+    tables.append(_pack_strings([','.join(tags) for tags in role_data['question_tags']]))
+    tables.append(_pack_strings([
+        REFERENCE_SEPARATOR.join(references) for references in role_data['question_references']
+    ]))
+    
+    offsets = []
+    position = SECTION_HEADER.size
+    for table in tables:
+        offsets.append(position)
+        position += len(table)
+    return SECTION_HEADER.pack(*offsets) + b''.join(tables), len(role_concepts)
+
+def normalize_role(role, data):
+    """Validate one role's source data into string lists plus per-question tags and references"""
+    from ai_engine import METRIC_INDEX
+    
+    role_data = {}
+    for field in CONCEPT_FIELDS:
+        values = data.get(field, [])
+        if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+            raise ValueError(f"Role '{role}': '{field}' must be a list of strings")
+        role_data[field] = list(values)
+    
+    questions, question_tags, question_references = [], [], []
+    for question in data.get('questions', []):
+        if isinstance(question, str):
+            text, tags, references = question, [], []
+        elif isinstance(question, dict) and isinstance(question.get('text'), str):
+            text, tags, references = question['text'], question.get('tags', []), question.get('references', [])
+        else:
+            raise ValueError(f"Role '{role}': questions must be strings or objects with a 'text' string")
+        if not isinstance(tags, list) or not all(isinstance(tag, str) and tag in METRIC_INDEX for tag in tags):
+            raise ValueError(
+                f"Role '{role}': tags of '{text}' must be a list of metric names ({', '.join(METRIC_INDEX)})"
+            )
+        if not isinstance(references, list) or not all(
+                isinstance(reference, str) and REFERENCE_SEPARATOR not in reference for reference in references):
+            raise ValueError(f"Role '{role}': references of '{text}' must be a list of strings")
+        questions.append(text)
+        question_tags.append(list(tags))
+        question_references.append(list(references))
+    role_data['questions'] = questions
+    role_data['question_tags'] = question_tags
+    role_data['question_references'] = question_references
+    return role_data
+
+def load_knowledge_source(directory):
+    """Read a source directory into {role: role data}"""
+    roles = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.json'):
+            continue
+        role = filename[:-len('.json')]
+        with open(os.path.join(directory, filename), encoding='utf-8') as handle:
+            roles[role] = normalize_role(role, json.load(handle))
+    return roles
+
+def compile_knowledge_base(roles, output_path):
+    """Write {role: role data} as a binary index; replaces output_path atomically"""
+    digest = hashlib.sha1()
+    sections = []
+    for role in sorted(roles):
+        role_data = normalize_role(role, roles[role])
+        digest.update(json.dumps([role, role_data], sort_keys=True).encode('utf-8'))
+        section, concept_count = _pack_role(role_data)
+        sections.append((role.encode('utf-8'), section, concept_count))
+    
+    position = HEADER.size
+    directory = []
+    for name, section, concept_count in sections:
+        directory.append(DIRECTORY_ENTRY.pack(position, len(section), concept_count, len(name)) + name)
+        position += len(section)
+    
+    # Write beside the target and rename, so workers that still map the
+    # previous index keep reading the old file until they reload
+    temporary_path = f'{output_path}.tmp'
+    with open(temporary_path, 'wb') as handle:
+        handle.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(sections), digest.digest(), position))
+        for _, section, _ in sections:
+            handle.write(section)
+        handle.write(b''.join(directory))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary_path, output_path)
+    return digest.hexdigest()
+
+# Reader
+
+class StringTable:
+    """Strings stored in a mapped buffer, decoded one at a time"""
+    
+    def __init__(self, buffer, offset):
+        self.buffer = buffer
+        self.count = U32.unpack_from(buffer, offset)[0]
+        self.ends_offset = offset + U32.size
+        self.data_offset = self.ends_offset + self.count * U32.size
+    
+    def __len__(self):
+        return self.count
+    
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        start = U32.unpack_from(self.buffer, self.ends_offset + (i - 1) * U32.size)[0] if i else 0
+        end = U32.unpack_from(self.buffer, self.ends_offset + i * U32.size)[0]
+        return str(self.buffer[self.data_offset + start:self.data_offset + end], 'utf-8')
+    
+    def decode_all(self):
+        """Every string as a tuple"""
+        ends = struct.unpack_from(f'<{self.count}I', self.buffer, self.ends_offset)
+        data = self.buffer[self.data_offset:self.data_offset + (ends[-1] if ends else 0)]
+        strings = []
+        start = 0
+        for end in ends:
+            strings.append(str(data[start:end], 'utf-8'))
+            start = end
+        return tuple(strings)
+    
+    def find(self, string):
+        """Position of string in a sorted table, or -1"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self[middle] < string:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self.count and self[low] == string else -1
+
+class PostingsView(Mapping):
+    """Concepts containing each vocab word, read from the mapped index on demand"""
+    
+    def __init__(self, vocab, buffer, offset, concepts):
+        self.vocab = vocab
+        self.buffer = buffer
+        self.ends_offset = offset + U32.size
+        self.ids_offset = self.ends_offset + vocab.count * U32.size
+        self.concepts = concepts
+    
+    def __getitem__(self, word):
+        i = self.vocab.find(word)
+        if i < 0:
+            raise KeyError(word)
+        start = U32.unpack_from(self.buffer, self.ends_offset + (i - 1) * U32.size)[0] if i else 0
+        end = U32.unpack_from(self.buffer, self.ends_offset + i * U32.size)[0]
+        ids = struct.unpack_from(f'<{end - start}I', self.buffer, self.ids_offset + start * U32.size)
+        return tuple(self.concepts(concept_id) for concept_id in ids)
+    
+    def __iter__(self):
+        return iter(self.vocab.decode_all())
+    
+    def __len__(self):
+        return self.vocab.count
+
+class LazyRoleMap(Mapping):
+    """Read-only role -> value mapping that decodes values on first use"""
+    
+    # At most max_loaded decoded values are kept; the least recently used
+    # role is dropped and decoded again if it is needed later.
+    
+    def __init__(self, roles, load, max_loaded=64):
+        self.roles = roles
+        self.load = load
+        self.max_loaded = max_loaded
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __getitem__(self, role):
+        with self._lock:
+            value = self._loaded.get(role)
+            if value is not None:
+                self._loaded.move_to_end(role)
+                return value
+        if role not in self.roles:
+            raise KeyError(role)
+        value = self.load(role)
+        with self._lock:
+            self._loaded[role] = value
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        return value
+    
+    def __contains__(self, role):
+        return role in self.roles
+    
+    def __iter__(self):
+        return iter(self.roles)
+    
+    def __len__(self):
+        return len(self.roles)
+    
+    def loaded_count(self):
+        return len(self._loaded)
+
+class KnowledgeIndex:
+    """Memory-mapped compiled knowledge base"""
+    
+    def __init__(self, path, max_loaded_roles=64):
+        self.path = path
+        self.max_loaded_roles = max_loaded_roles
+        with open(path, 'rb') as handle:
+            self.signature = self._signature(os.fstat(handle.fileno()))
+            self.buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, version, _, role_count, digest, directory_offset = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled knowledge base")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+        self.digest = digest.hex()
+        
+        # Only the role directory is read up front
+        self.sections = {}
+        concept_roles = []
+        position = directory_offset
+        for _ in range(role_count):
+            offset, length, concept_count, name_length = DIRECTORY_ENTRY.unpack_from(self.buffer, position)
+            position += DIRECTORY_ENTRY.size
+            role = str(self.buffer[position:position + name_length], 'utf-8')
+            position += name_length
+            self.sections[role] = offset
+            if concept_count:
+                concept_roles.append(role)
+        
+        concept_roles = frozenset(concept_roles)
+        self.knowledge_base = LazyRoleMap(concept_roles, self._load_role_data, max_loaded_roles)
+        self.concept_index = LazyRoleMap(concept_roles, self._load_concept_index, max_loaded_roles)
+        self.question_banks = LazyRoleMap(frozenset(self.sections), self._load_questions, max_loaded_roles)
+        self.question_tags = LazyRoleMap(frozenset(self.sections), self._load_question_tags, max_loaded_roles)
+        self.question_references = LazyRoleMap(
+            frozenset(self.sections), self._load_question_references, max_loaded_roles
+        )
+    
+    @staticmethod
+    def _signature(stat):
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    
+    def changed(self):
+        """True when the file at path has been replaced since it was opened"""
+        try:
+            return self._signature(os.stat(self.path)) != self.signature
+        except OSError:
+            return False
+    
+    def _table(self, role, part):
+        section = self.sections[role]
+        return section + SECTION_HEADER.unpack_from(self.buffer, section)[part]
+    
+    def _load_role_data(self, role):
+        return MappingProxyType({
+            field: StringTable(self.buffer, self._table(role, part)).decode_all()
+            for part, field in enumerate(CONCEPT_FIELDS)
+        })
+    
+    def _load_questions(self, role):
+        return StringTable(self.buffer, self._table(role, 3)).decode_all()
+    
+    def _load_question_tags(self, role):
+        return tuple(
+            tuple(tags.split(',')) if tags else ()
+            for tags in StringTable(self.buffer, self._table(role, 6)).decode_all()
+        )
+    
+    def _load_question_references(self, role):
+        return tuple(
+            tuple(references.split(REFERENCE_SEPARATOR)) if references else ()
+            for references in StringTable(self.buffer, self._table(role, 7)).decode_all()
+        )
+    
+    def _load_concept_index(self, role):
+        # The vocab set is what scoring needs; postings stay in the mapping
+        vocab = StringTable(self.buffer, self._table(role, 4))
+        tables = [StringTable(self.buffer, self._table(role, part)) for part in range(3)]
+        
+        def concept(concept_id):
+            for table in tables:
+                if concept_id < table.count:
+                    return table[concept_id]
+                concept_id -= table.count
+            raise IndexError(concept_id)
+        
+        return RoleConceptIndex(
+            vocab=frozenset(vocab.decode_all()),
+            postings=PostingsView(vocab, self.buffer, self._table(role, 5), concept),
+            total_concept_words=vocab.count
+        )
+
+def export_builtin(directory):
+    """Write the built-in knowledge base and question banks as a source directory"""
+    from ai_engine import AdvancedAIEngine
+    
+    engine = AdvancedAIEngine()
+    os.makedirs(directory, exist_ok=True)
+    roles = set(engine.knowledge_base) | set(engine.question_banks)
+    for role in sorted(roles):
+        role_data = engine.knowledge_base.get(role, {})
+        data = {field: list(role_data.get(field, ())) for field in CONCEPT_FIELDS}
+        data['questions'] = list(engine.question_banks.get(role, ()))
+        with open(os.path.join(directory, f'{role}.json'), 'w', encoding='utf-8') as handle:
+            json.dump(data, handle, indent=2, ensure_ascii=False)
+            handle.write('\n')
+    return sorted(roles)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compile the interview knowledge base')
+    commands = parser.add_subparsers(dest='command', required=True)
+    compile_parser = commands.add_parser('compile', help='compile a source directory into a binary index')
+    compile_parser.add_argument('source', help='directory with one <role>.json file per role')
+    compile_parser.add_argument('output', help='index file to write')
+    export_parser = commands.add_parser('export', help='write the built-in knowledge base as a source directory')
+    export_parser.add_argument('directory')
+    args = parser.parse_args(argv)
+    
+    if args.command == 'compile':
+        roles = load_knowledge_source(args.source)
+        digest = compile_knowledge_base(roles, args.output)
+        print(f"Compiled {len(roles)} roles into {args.output} ({digest[:12]})")
+    else:
+        roles = export_builtin(args.directory)
+        print(f"Exported {len(roles)} roles to {args.directory}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
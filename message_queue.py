@@ -0,0 +1,59 @@
+import pickle
+import queue
+import threading
+
+import socketio
+
+class LocalPubSubManager(socketio.PubSubManager):
+    """In-process stand-in for a Redis or Kombu Socket.IO message queue"""
+    
+    # Every manager on a channel gets its own subscriber queue, so several
+    # SocketIO servers in one process (as in tests) see each other's emits
+    # exactly as separate workers would through Redis. Messages are pickled
+    # like on a real queue, so unpicklable payloads fail here too.
+    name = 'local'
+    
+    _channels = {}
+    _channels_lock = threading.Lock()
+    
+    def __init__(self, channel='socketio', write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.queue = None
+        if not write_only:
+            self.queue = queue.Queue()
+            with self._channels_lock:
+                self._channels.setdefault(channel, []).append(self.queue)
+    
+    def close(self):
+        """Stop receiving messages published on the channel"""
+        subscriber, self.queue = self.queue, None
+        if subscriber is not None:
+            with self._channels_lock:
+                self._channels[self.channel].remove(subscriber)
+            # Wakes the listener so it can finish
+            subscriber.put(None)
+    
+    def _publish(self, data):
+        message = pickle.dumps(data)
+        with self._channels_lock:
+            subscribers = list(self._channels.get(self.channel, ()))
+        for subscriber in subscribers:
+            subscriber.put(message)
+    
+    def _listen(self):
+        subscriber = self.queue
+        while subscriber is not None:
+            message = subscriber.get()
+            if message is None:
+                return
+            yield message
+
+def message_queue_options(url, channel='socketio'):
+    """SocketIO keyword arguments for a message queue URL ('' for none)"""
+    # 'local://' selects the in-process stand-in; anything else (redis://,
+    # amqp://, kafka://...) is handed to Flask-SocketIO's own queue support
+    if not url:
+        return {}
+    if url.startswith('local://'):
+        return {'client_manager': LocalPubSubManager(channel=channel)}
+    return {'message_queue': url, 'channel': channel}
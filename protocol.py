@@ -0,0 +1,60 @@
+import json
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# 'json' sends one JSON event per message, as every client understands.
+# 'compact' sends each answer's evaluation and whatever follows it as one
+# binary 'answer-result' frame, without the text the client already has.
+PROTOCOLS = ('json', 'compact')
+
+# Frame layout: one flags byte, then the payload
+FRAME_MSGPACK = 0x01
+FRAME_DEFLATE = 0x02
+
+# Smaller payloads are not worth compressing
+COMPRESS_MIN_BYTES = 1024
+
+# Evaluation fields the client sent itself or does not use
+COMPACT_DROPPED_FIELDS = ('question', 'answer', 'timestamp')
+
+def negotiate_protocol(requested):
+    """Protocol to use for a client asking for requested"""
+    if requested == 'compact' and msgpack is not None:
+        return 'compact'
+    return 'json'
+
+def compact_evaluation(evaluation):
+    return {key: value for key, value in evaluation.items() if key not in COMPACT_DROPPED_FIELDS}
+
+def answer_result_frame(evaluation, next_question=None, summary=None):
+    """One compact frame with an evaluation and the next question or the final summary"""
+    message = {'evaluation': compact_evaluation(evaluation)}
+    if next_question is not None:
+        message['nextQuestion'] = next_question
+    if summary is not None:
+        message['summary'] = summary
+    return encode_frame(message)
+
+def encode_frame(message):
+    """Serialize with MessagePack and deflate the result when that pays off"""
+    flags = FRAME_MSGPACK
+    payload = msgpack.packb(message, use_bin_type=True)
+    if len(payload) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(payload, 6)
+        if len(compressed) < len(payload):
+            flags |= FRAME_DEFLATE
+            payload = compressed
+    return bytes([flags]) + payload
+
+def decode_frame(frame):
+    """Inverse of encode_frame"""
+    flags, payload = frame[0], bytes(frame[1:])
+    if flags & FRAME_DEFLATE:
+        payload = zlib.decompress(payload)
+    if flags & FRAME_MSGPACK:
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload.decode('utf-8'))
@@ -0,0 +1,372 @@
+"""Streaming quantile sketches of interview scores.
+
+QuantileSketch is a KLL sketch: values go into a stack of sorted
+compactors, and a full compactor promotes every other value to the level
+above, where each value stands for twice as many. Memory stays around 3k
+values whatever the stream length, two sketches merge by concatenating
+their levels, and ranks are within about 1.7/k of exact.
+
+ScoreDistributions keeps one sketch of the score and of every metric per
+role and per bank question id, so an answer can be ranked against everyone
+who answered the same question. Each process saves what it recorded itself
+(its delta) to a directory shared by the workers, and merges every delta
+found there on startup. Deltas of workers that have exited are compacted
+into one baseline file then, so restarts do not leave files behind.
+"""
+import atexit
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from array import array
+from bisect import bisect_left, insort
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Compactor size; ranks are within about 1.7/k of the true rank
+DEFAULT_K = 128
+# Each level below the top holds this fraction of the level above it
+LEVEL_SHRINK = 2 / 3
+
+# Fewer samples than this are not worth ranking against
+MIN_RANKED_SAMPLES = 20
+
+# Files in a persisted distributions directory
+BASELINE_NAME = 'baseline.json'
+DIRECTORY_LOCK_NAME = 'lock'
+DELTA_PREFIX = 'worker-'
+
+def _read_state(path):
+    with open(path) as state_file:
+        return json.load(state_file)
+
+def _write_state(path, state):
+    """Replace path with state atomically"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as state_file:
+        json.dump(state, state_file, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+def _lock_file(path, blocking=True):
+    """Open path holding an exclusive flock on it, or None if another process holds it"""
+    lock_file = open(path, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+def _worker_lock_path(delta_path):
+    return delta_path[:-len('.json')] + '.lock'
+
+def _worker_exited(lock_path):
+    """True when no running process holds the lock of a worker's delta"""
+    if not os.path.exists(lock_path):
+        return True
+    lock_file = _lock_file(lock_path, blocking=False)
+    if lock_file is None:
+        return False
+    lock_file.close()
+    return True
+
+class QuantileSketch:
+    """Mergeable KLL sketch answering rank and quantile queries in O(log n)"""
+    
+    # Every level is kept sorted, so a rank is one bisection per level and
+    # needs no rebuilding however updates and queries interleave.
+    
+    __slots__ = ('k', 'count', 'levels', '_random', '_items', '_cumulative')
+    
+    def __init__(self, k=DEFAULT_K):
+        self.k = k
+        self.count = 0
+        self.levels = [array('d')]
+        self._random = random.Random()
+        # All values with cumulative weights for quantile(), rebuilt after a change
+        self._items = None
+        self._cumulative = None
+    
+    def __len__(self):
+        return self.count
+    
+    def update(self, value):
+        insort(self.levels[0], value)
+        self.count += 1
+        self._items = None
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+    
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(array('d'))
+        for level, values in enumerate(other.levels):
+            self.levels[level] = array('d', sorted(self.levels[level] + values))
+        self.count += other.count
+        self._items = None
+        self._compress()
+    
+    def rank(self, value):
+        """Estimated fraction of the values seen that are below value"""
+        if not self.count:
+            return 0.0
+        below = total = 0
+        for level, values in enumerate(self.levels):
+            below += bisect_left(values, value) << level
+            total += len(values) << level
+        return below / total
+    
+    def quantile(self, fraction):
+        """Estimated value below which the given fraction of the values fall"""
+        if not self.count:
+            return None
+        items, cumulative = self._view()
+        target = fraction * cumulative[-1]
+        return items[min(bisect_left(cumulative, target), len(items) - 1)]
+    
+    def to_state(self):
+        """JSON-serializable form"""
+        return {'k': self.k, 'count': self.count, 'levels': [list(values) for values in self.levels]}
+    
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['k'])
+        sketch.count = state['count']
+        sketch.levels = [array('d', values) for values in state['levels']]
+        return sketch
+    
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(self.k * LEVEL_SHRINK ** depth))
+    
+    def _compress(self):
+        """Compact full levels, lowest first, until the sketch fits its budget again"""
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(array('d'))
+                values = self.levels[level]
+                # An odd value out stays behind; every other remaining value
+                # is promoted, starting at a random one of the first two
+                kept = values[:len(values) % 2]
+                offset = len(kept) + self._random.getrandbits(1)
+                self.levels[level + 1] = array('d', sorted(self.levels[level + 1] + values[offset::2]))
+                self.levels[level] = kept
+            level += 1
+    
+    def _view(self):
+        if self._items is None:
+            weighted = sorted(
+                (value, 1 << level) for level, values in enumerate(self.levels) for value in values
+            )
+            self._items = [value for value, _ in weighted]
+            self._cumulative = []
+            total = 0
+            for _, weight in weighted:
+                total += weight
+                self._cumulative.append(total)
+        return self._items, self._cumulative
+
+class ScoreDistributions:
+    """Sketches of the score and each metric per role and per question"""
+    
+    # Keys are (role, question id) for one question and (role, None) for the
+    # whole role; each holds one sketch per name in keys. Interview average
+    # scores have their own sketch per role. Callers only pass roles and ids
+    # from the question bank, so the number of keys is bounded by its size.
+    
+    def __init__(self, keys, k=DEFAULT_K):
+        self.keys = tuple(keys)
+        self.k = k
+        self._lock = threading.Lock()
+        self._answers = {}
+        self._interviews = {}
+        # What this process recorded, saved separately so workers never count
+        # each other's evaluations twice
+        self._delta = None
+        self._worker_lock = None
+    
+    def add(self, role, question, values):
+        """Record one answer's values (in keys order) for its question id and role
+        
+        A question of None records the answer for the role only.
+        """
+        keys = ((role, None),) if question is None else ((role, question), (role, None))
+        with self._lock:
+            for target in self._targets():
+                for key in keys:
+                    sketches = target._answers.get(key)
+                    if sketches is None:
+                        sketches = target._answers[key] = [QuantileSketch(self.k) for _ in self.keys]
+                    for sketch, value in zip(sketches, values):
+                        sketch.update(value)
+    
+    def add_interview(self, role, average_score):
+        with self._lock:
+            for target in self._targets():
+                sketch = target._interviews.get(role)
+                if sketch is None:
+                    sketch = target._interviews[role] = QuantileSketch(self.k)
+                sketch.update(average_score)
+    
+    def percentiles(self, role, question, values):
+        """Percent of earlier answers each value beats, for the question and the role
+        
+        A level with fewer than MIN_RANKED_SAMPLES answers is left out, and
+        so is the question level when question is None.
+        """
+        levels = (('role', (role, None)),)
+        if question is not None:
+            levels = (('question', (role, question)),) + levels
+        result = {}
+        with self._lock:
+            for level, key in levels:
+                sketches = self._answers.get(key)
+                if sketches and sketches[0].count >= MIN_RANKED_SAMPLES:
+                    result[level] = {
+                        name: round(100 * sketch.rank(value))
+                        for name, sketch, value in zip(self.keys, sketches, values)
+                    }
+        return result
+    
+    def interview_percentile(self, role, average_score):
+        """Percent of earlier interviews for the role with a lower average, or None"""
+        with self._lock:
+            sketch = self._interviews.get(role)
+            if sketch is None or sketch.count < MIN_RANKED_SAMPLES:
+                return None
+            return round(100 * sketch.rank(average_score))
+    
+    def merge(self, other):
+        """Fold in another ScoreDistributions recorded with the same keys"""
+        if other.keys != self.keys:
+            raise ValueError(f"Cannot merge distributions of {other.keys} into {self.keys}")
+        with self._lock:
+            for key, sketches in other._answers.items():
+                mine = self._answers.setdefault(key, [QuantileSketch(self.k) for _ in self.keys])
+                for sketch, theirs in zip(mine, sketches):
+                    sketch.merge(theirs)
+            for role, sketch in other._interviews.items():
+                self._interviews.setdefault(role, QuantileSketch(self.k)).merge(sketch)
+    
+    def to_state(self):
+        with self._lock:
+            return self._state()
+    
+    def _state(self):
+        return {
+            'keys': list(self.keys),
+            'answers': [
+                [role, question, [sketch.to_state() for sketch in sketches]]
+                for (role, question), sketches in self._answers.items()
+            ],
+            'interviews': {role: sketch.to_state() for role, sketch in self._interviews.items()}
+        }
+    
+    @classmethod
+    def from_state(cls, state, k=DEFAULT_K):
+        distributions = cls(state['keys'], k)
+        for role, question, sketches in state['answers']:
+            if isinstance(question, str):
+                # Saved when questions were keyed by their text
+                continue
+            distributions._answers[(role, question)] = [QuantileSketch.from_state(sketch) for sketch in sketches]
+        for role, sketch in state['interviews'].items():
+            distributions._interviews[role] = QuantileSketch.from_state(sketch)
+        return distributions
+    
+    def load_directory(self, directory):
+        """Merge in everything saved to directory, then start recording a delta of our own
+        
+        Deltas of processes that have exited are compacted into the
+        directory's baseline and deleted, so it only ever holds the baseline
+        and one delta per running worker. Deltas saved with other keys
+        (before a metric was added) are skipped.
+        """
+        if os.path.isdir(directory):
+            # Without flock there is no telling exited workers from running
+            # ones, so every delta is merged and none is compacted
+            directory_lock = _lock_file(os.path.join(directory, DIRECTORY_LOCK_NAME)) if fcntl else None
+            try:
+                self._load_deltas(directory, compact=directory_lock is not None)
+            finally:
+                if directory_lock is not None:
+                    directory_lock.close()
+        self._delta = ScoreDistributions(self.keys, self.k)
+    
+    def _load_deltas(self, directory, compact):
+        baseline_path = os.path.join(directory, BASELINE_NAME)
+        baseline = ScoreDistributions(self.keys, self.k)
+        # Deltas already in the baseline, in case we stopped before deleting them
+        merged = set()
+        if os.path.exists(baseline_path):
+            state = _read_state(baseline_path)
+            if tuple(state['keys']) == self.keys:
+                baseline = ScoreDistributions.from_state(state, self.k)
+                merged = set(state.get('merged', ()))
+        
+        running = ScoreDistributions(self.keys, self.k)
+        compacted = []
+        for name in sorted(os.listdir(directory)):
+            if not (name.startswith(DELTA_PREFIX) and name.endswith('.json')):
+                continue
+            if name in merged:
+                compacted.append(name)
+                continue
+            path = os.path.join(directory, name)
+            exited = compact and _worker_exited(_worker_lock_path(path))
+            state = _read_state(path)
+            if tuple(state['keys']) == self.keys:
+                (baseline if exited else running).merge(ScoreDistributions.from_state(state, self.k))
+            if exited:
+                compacted.append(name)
+        
+        if compacted:
+            # The baseline names what it absorbed before any delta is deleted
+            state = baseline.to_state()
+            state['merged'] = compacted
+            _write_state(baseline_path, state)
+            for name in compacted:
+                path = os.path.join(directory, name)
+                for leftover in (path, _worker_lock_path(path)):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+        self.merge(baseline)
+        self.merge(running)
+    
+    def save_delta(self, path):
+        """Atomically write what this process recorded since load_directory()"""
+        if self._delta is None:
+            return
+        # The delta is only written to under our lock
+        with self._lock:
+            state = self._delta._state()
+        _write_state(path, state)
+    
+    def persist(self, directory, interval=60.0):
+        """Load directory and keep saving this process's delta there every interval seconds"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{DELTA_PREFIX}{uuid.uuid4().hex}.json")
+        # Held for as long as this process runs, so other workers starting up
+        # leave our delta alone
+        self._worker_lock = _lock_file(_worker_lock_path(path)) if fcntl else None
+        self.load_directory(directory)
+        
+        def run():
+            while True:
+                time.sleep(interval)
+                self.save_delta(path)
+        
+        threading.Thread(target=run, name='score-distributions', daemon=True).start()
+        atexit.register(self.save_delta, path)
+        return path
+    
+    def _targets(self):
+        return (self,) if self._delta is None else (self, self._delta)
@@ -0,0 +1,154 @@
+"""TF-IDF similarity between answers and the reference text of their question.
+
+A question's reference documents are its own text plus any reference
+answers the knowledge base gives for it. A ReferenceModel is built once per
+question bank: the IDF table and one L2-normalized sparse TF-IDF row per
+document. Scoring an answer weighs its distinct terms and takes a sparse
+dot product with its question's rows, so it costs microseconds and needs
+no language model.
+"""
+import math
+
+# Characters _preprocess_words keeps that do not belong in a term
+TERM_PUNCTUATION = '.,!?-'
+
+# Words too common to say anything about the topic (the tokenizer already
+# drops words of two letters or less)
+STOP_WORDS = frozenset([
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'your', 'all', 'any', 'can',
+    'had', 'has', 'have', 'her', 'his', 'how', 'its', 'our', 'out', 'was', 'were',
+    'what', 'when', 'where', 'which', 'who', 'why', 'will', 'with', 'would', 'this',
+    'that', 'these', 'those', 'there', 'their', 'they', 'them', 'then', 'than',
+    'from', 'into', 'about', 'also', 'been', 'being', 'did', 'does', 'doing', 'each',
+    'just', 'more', 'most', 'some', 'such', 'very', 'she', 'him', 'one', 'could',
+    'should', 'may', 'might', 'must', 'shall', 'over', 'only', 'own', 'same', 'too',
+    "what's", "it's", "i'm", "i've", "don't"
+])
+
+# Cosine similarity that earns the full relevance score; answers share only
+# part of their vocabulary with even the closest reference
+FULL_MARKS_SIMILARITY = 0.4
+
+# Questions outside the bank whose rows are kept, before the cache is reset
+MAX_CACHED_QUESTIONS = 1024
+
+def count_terms(word_counts):
+    """Term frequencies from (word, count) pairs of _preprocess_words output"""
+    terms = {}
+    for word, count in word_counts:
+        term = word.strip(TERM_PUNCTUATION)
+        if len(term) > 2 and term not in STOP_WORDS:
+            terms[term] = terms.get(term, 0) + count
+    return terms
+
+def count_words(words):
+    """Term frequencies of a list of _preprocess_words output"""
+    counts = {}
+    for word in words:
+        counts[word] = counts.get(word, 0) + 1
+    return count_terms(counts.items())
+
+class ReferenceModel:
+    """IDF table and reference rows for one question bank"""
+    
+    # Rows map a term to its weight. Sums go through math.fsum, which rounds
+    # once whatever the order, so the same words give the same score however
+    # they were counted (whole answer, live draft or stream).
+    
+    def __init__(self, questions, references, tokenize):
+        self.tokenize = tokenize
+        documents = []
+        owners = []
+        # Questions with reference answers; the others are only compared with their own text
+        self.referenced = set()
+        for i, question in enumerate(questions):
+            texts = [question]
+            if i < len(references) and references[i]:
+                texts.extend(references[i])
+                self.referenced.add(question)
+            for text in texts:
+                documents.append(count_words(tokenize(text)))
+                owners.append(question)
+        
+        document_frequency = {}
+        for terms in documents:
+            for term in terms:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        
+        # Smoothed IDF; a term no document has gets the highest weight
+        count = len(documents)
+        self.idf = {
+            term: math.log((1 + count) / (1 + frequency)) + 1
+            for term, frequency in document_frequency.items()
+        }
+        self.unseen_idf = math.log(1 + count) + 1
+        
+        question_rows = {}
+        for question, terms in zip(owners, documents):
+            row = self._row(terms)
+            if row:
+                question_rows.setdefault(question, []).append(row)
+        self.question_rows = {question: tuple(rows) for question, rows in question_rows.items()}
+        self._other_rows = {}
+    
+    def has_references(self, question):
+        """True when the question has reference answers, so its relevance is meaningful"""
+        return question in self.referenced
+    
+    def similarity(self, question, terms):
+        """Cosine similarity of answer terms to the closest reference document"""
+        return self._best(self.rows_for(question), self._weigh(terms))
+    
+    def similarities(self, questions, term_lists):
+        """similarity() for a batch, resolving each distinct question once"""
+        rows_by_question = {}
+        results = []
+        for question, terms in zip(questions, term_lists):
+            rows = rows_by_question.get(question)
+            if rows is None:
+                rows = rows_by_question[question] = self.rows_for(question)
+            results.append(self._best(rows, self._weigh(terms)))
+        return results
+    
+    def rows_for(self, question):
+        """Reference rows of a question, weighed on the fly for one outside the bank"""
+        rows = self.question_rows.get(question)
+        if rows is not None:
+            return rows
+        rows = self._other_rows.get(question)
+        if rows is None:
+            if len(self._other_rows) >= MAX_CACHED_QUESTIONS:
+                self._other_rows = {}
+            row = self._row(count_words(self.tokenize(question)))
+            rows = self._other_rows[question] = (row,) if row else ()
+        return rows
+    
+    def _row(self, terms):
+        """L2-normalized TF-IDF weights of a document's terms"""
+        weights, norm = self._weigh(terms)
+        if not norm:
+            return None
+        return {term: weight / norm for term, weight in weights.items()}
+    
+    def _weigh(self, terms):
+        """Sublinear TF-IDF weights of terms and their L2 norm"""
+        idf = self.idf
+        unseen_idf = self.unseen_idf
+        weights = {}
+        for term, count in terms.items():
+            weights[term] = (1 + math.log(count)) * idf.get(term, unseen_idf)
+        return weights, math.sqrt(math.fsum(weight * weight for weight in weights.values()))
+    
+    @staticmethod
+    def _best(rows, weighed):
+        weights, norm = weighed
+        if not norm:
+            return 0.0
+        best = 0.0
+        for row in rows:
+            if len(row) < len(weights):
+                dot = math.fsum(weight * weights[term] for term, weight in row.items() if term in weights)
+            else:
+                dot = math.fsum(weight * row[term] for term, weight in weights.items() if term in row)
+            best = max(best, dot / norm)
+        return best
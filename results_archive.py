@@ -0,0 +1,169 @@
+"""Archive of completed interviews and streaming exports of it.
+
+Interview sessions only live as long as the candidate's connection, so
+completed interviews are copied into a SQLite archive. Exports read the
+archive in batches of EXPORT_BATCH_SIZE interviews ordered by completion
+time, and turn each batch into output chunks as the response is sent, so
+exporting any number of interviews holds one batch in memory at a time.
+"""
+import csv
+import io
+import json
+import sqlite3
+import threading
+from ai_engine import EvaluationRecord
+from session_store import serialize_session
+
+EXPORT_FORMATS = ('ndjson', 'csv', 'json')
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'json': 'application/json'
+}
+
+# Interviews read from the archive per query
+EXPORT_BATCH_SIZE = 500
+# Output is sent in chunks of roughly this many characters
+EXPORT_CHUNK_CHARS = 64 * 1024
+
+# One CSV row per answer
+CSV_COLUMNS = (
+    'sessionId', 'candidateName', 'role', 'endTime', 'averageScore',
+    'questionNumber', 'question', 'answer', 'score', 'feedback', 'followUp', 'duplicateSimilarity'
+)
+# Spreadsheets run cells starting with these as formulas
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+class ResultArchive:
+    """Completed interviews in a SQLite file, indexed by completion time"""
+    
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS interview_results ('
+            'session_id TEXT PRIMARY KEY, completed_at REAL NOT NULL, state TEXT NOT NULL)'
+        )
+        self._db.execute(
+            'CREATE INDEX IF NOT EXISTS interview_results_completed '
+            'ON interview_results (completed_at, session_id)'
+        )
+    
+    def add(self, session):
+        """Archive a completed session"""
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO interview_results (session_id, completed_at, state) VALUES (?, ?, ?)',
+                (session['id'], session['endTime'].timestamp(), serialize_session(session))
+            )
+    
+    def get(self, session_id):
+        """The session_state() dict of an archived interview, or None"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT state FROM interview_results WHERE session_id = ?', (session_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def iter_range(self, since=None, until=None, batch_size=EXPORT_BATCH_SIZE):
+        """Yield interviews completed in [since, until) (Unix times), oldest first"""
+        # Each batch is its own query that resumes after the last row seen,
+        # so the lock is never held while the caller sends output
+        since = float('-inf') if since is None else since
+        until = float('inf') if until is None else until
+        position = (since, '')
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    'SELECT completed_at, session_id, state FROM interview_results '
+                    'WHERE (completed_at, session_id) > (?, ?) AND completed_at < ? '
+                    'ORDER BY completed_at, session_id LIMIT ?',
+                    (position[0], position[1], until, batch_size)
+                ).fetchall()
+            for row in rows:
+                yield json.loads(row[2])
+            if len(rows) < batch_size:
+                return
+            position = rows[-1][:2]
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+def export_record(state):
+    """An archived interview in the shape exports use, with every evaluation expanded"""
+    interview = state['interview']
+    summary = state.get('summary') or {}
+    return {
+        'sessionId': state['id'],
+        'candidateName': state['candidateName'],
+        'role': interview['role'],
+        'questionMode': interview.get('questionMode', 'sequential'),
+        'startTime': state['startTime'],
+        'endTime': state['endTime'],
+        'averageScore': summary.get('averageScore'),
+        'overallFeedback': summary.get('overallFeedback'),
+        'aiInsights': summary.get('aiInsights', {}),
+        'improvementAreas': summary.get('improvementAreas', []),
+        'strengths': summary.get('strengths', []),
+        'evaluations': [
+            EvaluationRecord.from_state(record).to_dict(evaluation_id)
+            for evaluation_id, record in enumerate(interview['history'])
+        ]
+    }
+
+def iter_export(states, export_format, single=False):
+    """Yield an export of states in chunks; single exports one interview as a JSON object"""
+    if export_format == 'ndjson':
+        parts = (json.dumps(export_record(state)) + '\n' for state in states)
+    elif export_format == 'csv':
+        parts = _iter_csv(states)
+    elif single:
+        parts = (json.dumps(export_record(state)) for state in states)
+    else:
+        parts = _iter_json_array(states)
+    
+    buffer, size = [], 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= EXPORT_CHUNK_CHARS:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+def _iter_json_array(states):
+    yield '['
+    separator = ''
+    for state in states:
+        yield separator + json.dumps(export_record(state))
+        separator = ','
+    yield ']'
+
+def _csv_cell(value):
+    """Quote candidate-supplied text so spreadsheets show it instead of evaluating it"""
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def _iter_csv(states):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CSV_COLUMNS)
+    yield output.getvalue()
+    output.seek(0)
+    output.truncate()
+    for state in states:
+        record = export_record(state)
+        for number, evaluation in enumerate(record['evaluations'], 1):
+            writer.writerow([_csv_cell(value) for value in (
+                record['sessionId'], record['candidateName'], record['role'], record['endTime'],
+                record['averageScore'], number, evaluation['question'], evaluation['answer'],
+                evaluation['score'], evaluation['feedback'], evaluation['follow_up'],
+                evaluation.get('duplicate_similarity')
+            )])
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+AI Interview Platform Production Server
+Runs the Socket.IO app on an async backend (eventlet or gevent) in several
+worker processes that share one port and coordinate through a message queue
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+
+ASYNC_MODES = ('eventlet', 'gevent')
+
+def reuse_port_socket(host, port, backlog=2048):
+    """Listening socket that other workers can bind to the same port"""
+    listener = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, 'SO_REUSEPORT'):
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    listener.bind((host, port))
+    listener.listen(backlog)
+    return listener
+
+def run_worker(async_mode, host, port):
+    """Serve the app in this process; never returns"""
+    # The async library has to patch the standard library before the app
+    # (and everything it imports) is loaded
+    if async_mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+        import eventlet.wsgi
+        listener = eventlet.listen((host, port), reuse_port=True, backlog=2048)
+        from app import app
+        eventlet.wsgi.server(listener, app, log_output=False)
+    else:
+        from gevent import monkey
+        monkey.patch_all()
+        from gevent.pywsgi import WSGIServer
+        options = {}
+        try:
+            from geventwebsocket.handler import WebSocketHandler
+            options['handler_class'] = WebSocketHandler
+        except ImportError:
+            pass
+        listener = reuse_port_socket(host, port)
+        from app import app
+        WSGIServer(listener, app, log=None, **options).serve_forever()
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Run the AI Interview Platform with async workers')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes sharing the port (default: one per CPU with a message queue, else 1)')
+    parser.add_argument('--async-mode', choices=ASYNC_MODES, default='eventlet')
+    parser.add_argument('--message-queue', default=os.environ.get('MESSAGE_QUEUE', ''),
+                        help='queue the workers coordinate emits through, e.g. redis://localhost:6379/0')
+    return parser.parse_args(argv)
+
+def single_worker_reason(args):
+    """Why this setup cannot run several workers, or None if it can"""
+    if not args.message_queue or args.message_queue.startswith('local://'):
+        return "Several workers need a shared message queue (--message-queue redis://...)"
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        return "This platform cannot share a port between workers; use --workers 1"
+    if os.environ.get('INTERVIEW_LOG'):
+        return "An interview log belongs to one process; use --workers 1 or a shared SESSION_STORE"
+    return None
+
+def main(argv=None):
+    args = parse_args(argv)
+    reason = single_worker_reason(args)
+    if args.workers is None:
+        # One worker per CPU where they can coordinate; a plain start still runs
+        args.workers = os.cpu_count() or 1
+        if reason and args.workers > 1:
+            print(f"⚠️  Starting 1 worker instead of {args.workers}: {reason}", file=sys.stderr)
+            args.workers = 1
+    elif args.workers > 1 and reason:
+        print(f"❌ {reason}", file=sys.stderr)
+        return 2
+    
+    # Workers read their configuration from the environment like app.py does.
+    # With several workers a long-polling client could reach a different
+    # worker on every request, so clients are told to use WebSocket only.
+    os.environ['ASYNC_MODE'] = args.async_mode
+    os.environ['MESSAGE_QUEUE'] = args.message_queue
+    if args.workers > 1:
+        os.environ.setdefault('SOCKET_TRANSPORTS', 'websocket')
+    
+    print("🚀 AI Interview Platform")
+    print(f"📡 {args.workers} {args.async_mode} worker(s) on http://{args.host}:{args.port}")
+    
+    context = multiprocessing.get_context('spawn')
+    workers = {}
+    stopping = []
+    
+    def start_worker(worker_id):
+        process = context.Process(target=run_worker, args=(args.async_mode, args.host, args.port),
+                                  name=f'interview-worker-{worker_id}', daemon=False)
+        process.start()
+        workers[worker_id] = (process, time.monotonic())
+    
+    def stop(signum, frame):
+        stopping.append(signum)
+    
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for worker_id in range(args.workers):
+        start_worker(worker_id)
+    
+    # Replace workers that die; one that dies within a second of starting is
+    # restarted after a pause so a broken deployment does not spin
+    while not stopping:
+        time.sleep(0.5)
+        for worker_id, (process, started) in list(workers.items()):
+            if process.is_alive() or stopping:
+                continue
+            print(f"⚠️  Worker {worker_id} exited with {process.exitcode}; restarting", file=sys.stderr)
+            if time.monotonic() - started < 1.0:
+                time.sleep(1.0)
+            start_worker(worker_id)
+    
+    print("\n👋 Stopping workers")
+    for process, _ in workers.values():
+        process.terminate()
+    for process, _ in workers.values():
+        process.join(timeout=10)
+        if process.is_alive():
+            process.kill()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from ai_engine import AIInterviewer
+
+# Seconds a session is kept after it was last saved, so its candidate can
+# reconnect (to any worker) and resume it
+DEFAULT_SESSION_TTL = 24 * 60 * 60
+
+def session_state(session):
+    """JSON-serializable form of an interview session"""
+    return {
+        'id': session['id'],
+        'candidateName': session['candidateName'],
+        'status': session['status'],
+        'startTime': session['startTime'].isoformat(),
+        'endTime': session['endTime'].isoformat() if session.get('endTime') else None,
+        'evaluating': session.get('evaluating', False),
+        'protocol': session.get('protocol', 'json'),
+        'summary': session.get('summary'),
+        'interview': session['interviewer'].to_state()
+    }
+
+def session_from_state(state):
+    """Rebuild a live session from session_state() output"""
+    session = {
+        'id': state['id'],
+        'interviewer': AIInterviewer.from_state(state['interview']),
+        'candidateName': state['candidateName'],
+        'startTime': datetime.fromisoformat(state['startTime']),
+        'status': state['status'],
+        'evaluating': state['evaluating'],
+        'protocol': state.get('protocol', 'json')
+    }
+    if state['endTime']:
+        session['endTime'] = datetime.fromisoformat(state['endTime'])
+    if state['summary'] is not None:
+        session['summary'] = state['summary']
+    return session
+
+def serialize_session(session):
+    """Encode an interview session as compact JSON"""
+    return json.dumps(session_state(session), separators=(',', ':'))
+
+def deserialize_session(data):
+    """Decode serialize_session() output back into a live session"""
+    return session_from_state(json.loads(data))
+
+class MemorySessionStore:
+    """Keeps live sessions in this process; only valid with a single worker"""
+    
+    def __init__(self, ttl=DEFAULT_SESSION_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        # session id -> (session, expiry time), least recently saved first
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if entry[1] <= self.clock():
+                del self._sessions[session_id]
+                return None
+            return entry[0]
+    
+    def save(self, session_id, session):
+        now = self.clock()
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._sessions[session_id] = (session, now + self.ttl)
+            # Saving moves a session to the end, so the expired ones are at the start
+            while self._sessions:
+                oldest = next(iter(self._sessions.values()))
+                if oldest[1] > now:
+                    break
+                self._sessions.popitem(last=False)
+    
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+    
+    def release(self, session_id):
+        """Nothing to release; the sessions live here"""
+    
+    def __contains__(self, session_id):
+        return self.get(session_id) is not None
+    
+    def __len__(self):
+        return len(self._sessions)
+
+class SharedSessionStore:
+    """Base class for stores shared by several worker processes"""
+    
+    # Sessions are stored serialized with a version number. Each worker keeps
+    # the live objects it last saved or loaded, so while a candidate stays on
+    # one worker a lookup is a version check instead of a decode, and
+    # per-connection state such as the live answer draft survives.
+    
+    def __init__(self, ttl=DEFAULT_SESSION_TTL):
+        self.ttl = ttl
+        self._local = {}
+        self._local_lock = threading.Lock()
+    
+    def get(self, session_id):
+        version = self._load_version(session_id)
+        if version is None:
+            with self._local_lock:
+                self._local.pop(session_id, None)
+            return None
+        
+        with self._local_lock:
+            cached = self._local.get(session_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        data = self._load(session_id)
+        if data is None:
+            return None
+        session = deserialize_session(data)
+        with self._local_lock:
+            self._local[session_id] = (version, session)
+        return session
+    
+    def save(self, session_id, session):
+        version = self._store(session_id, serialize_session(session))
+        with self._local_lock:
+            self._local[session_id] = (version, session)
+    
+    def delete(self, session_id):
+        with self._local_lock:
+            self._local.pop(session_id, None)
+        self._delete(session_id)
+    
+    def release(self, session_id):
+        """Drop this worker's live copy of a session it no longer serves; the stored one is kept"""
+        with self._local_lock:
+            self._local.pop(session_id, None)
+    
+    def __contains__(self, session_id):
+        return self._load_version(session_id) is not None
+    
+    def _load_version(self, session_id):
+        raise NotImplementedError
+    
+    def _load(self, session_id):
+        raise NotImplementedError
+    
+    def _store(self, session_id, data):
+        """Write data and return the new version number"""
+        raise NotImplementedError
+    
+    def _delete(self, session_id):
+        raise NotImplementedError
+
+class SQLiteSessionStore(SharedSessionStore):
+    """Shared store in a SQLite file, for pre-fork workers on one host"""
+    
+    # Seconds between sweeps for expired sessions
+    PURGE_INTERVAL = 60.0
+    
+    def __init__(self, path, ttl=DEFAULT_SESSION_TTL):
+        super().__init__(ttl)
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        columns = [row[1] for row in self._db.execute('PRAGMA table_info(interview_sessions)')]
+        if columns and 'expires' not in columns:
+            # Sessions used to be stored by connection id, which no client can
+            # come back with
+            self._db.execute('DROP TABLE interview_sessions')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS interview_sessions ('
+            'session_id TEXT PRIMARY KEY, version INTEGER NOT NULL, expires REAL NOT NULL, state TEXT NOT NULL)'
+        )
+    
+    def _load_version(self, session_id):
+        with self._lock:
+            row = self._db.execute(
+                'SELECT version FROM interview_sessions WHERE session_id = ? AND expires > ?',
+                (session_id, time.time())
+            ).fetchone()
+        return row[0] if row else None
+    
+    def _load(self, session_id):
+        with self._lock:
+            row = self._db.execute(
+                'SELECT state FROM interview_sessions WHERE session_id = ? AND expires > ?',
+                (session_id, time.time())
+            ).fetchone()
+        return row[0] if row else None
+    
+    def _store(self, session_id, data):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                'INSERT INTO interview_sessions (session_id, version, expires, state) VALUES (?, 1, ?, ?) '
+                'ON CONFLICT(session_id) DO UPDATE SET version = version + 1, expires = excluded.expires, '
+                'state = excluded.state RETURNING version',
+                (session_id, now + self.ttl, data)
+            ).fetchone()
+            if now >= self._next_purge:
+                self._next_purge = now + self.PURGE_INTERVAL
+                self._db.execute('DELETE FROM interview_sessions WHERE expires <= ?', (now,))
+        return row[0]
+    
+    def _delete(self, session_id):
+        with self._lock:
+            self._db.execute('DELETE FROM interview_sessions WHERE session_id = ?', (session_id,))
+
+class RedisSessionStore(SharedSessionStore):
+    """Shared store in Redis, for workers spread over several hosts"""
+    
+    def __init__(self, client, prefix='interview:session:', ttl=DEFAULT_SESSION_TTL):
+        super().__init__(ttl)
+        self.client = client
+        self.prefix = prefix
+    
+    def _load_version(self, session_id):
+        version = self.client.hget(self.prefix + session_id, 'version')
+        return int(version) if version is not None else None
+    
+    def _load(self, session_id):
+        data = self.client.hget(self.prefix + session_id, 'state')
+        return data.decode('utf-8') if isinstance(data, bytes) else data
+    
+    def _store(self, session_id, data):
+        key = self.prefix + session_id
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.hincrby(key, 'version', 1)
+        pipeline.hset(key, 'state', data)
+        pipeline.expire(key, int(self.ttl))
+        return int(pipeline.execute()[0])
+    
+    def _delete(self, session_id):
+        self.client.delete(self.prefix + session_id)
+
+def create_session_store(url, ttl=DEFAULT_SESSION_TTL):
+    """Create a store from a URL: 'memory', 'sqlite:///path/to/file.db' or 'redis://host:port/db'
+    
+    Sessions are kept by their session id until ttl seconds after they were last saved.
+    """
+    if url == 'memory':
+        return MemorySessionStore(ttl)
+    if url.startswith('sqlite:///'):
+        return SQLiteSessionStore(url[len('sqlite:///'):], ttl)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("The redis package is required for a Redis session store: pip install redis")
+        return RedisSessionStore(redis.Redis.from_url(url), ttl=ttl)
+    raise ValueError(f"Unsupported session store URL: {url}")
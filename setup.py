@@ -16,6 +16,11 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/NextAI-Gen/ai-interview-platform",
     packages=find_packages(),
+    py_modules=[
+        "admission", "app", "ai_engine", "analysis_cache", "bulk_grade", "duplicate_index",
+        "evaluation_pool", "instrumentation", "interview_log", "knowledge_index", "message_queue",
+        "protocol", "quantile_sketch", "reference_similarity", "results_archive", "serve", "session_store",
+    ],
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -40,10 +45,24 @@ setup(
             "black>=21.0",
             "flake8>=3.8",
         ],
+        "production": [
+            "eventlet>=0.33",
+            "redis>=4.5",
+        ],
+        "compact": [
+            "msgpack>=1.0",
+        ],
+        "gevent": [
+            "gevent>=22.10",
+            "gevent-websocket>=0.10",
+            "redis>=4.5",
+        ],
     },
     entry_points={
         "console_scripts": [
             "ai-interview=app:main",
+            "ai-interview-grade=bulk_grade:main",
+            "ai-interview-serve=serve:main",
         ],
     },
     include_package_data=True,
@@ -3,6 +3,25 @@ let socket;
 let currentInterviewData = {};
 let currentQuestion = null;
 
+// Live draft scoring: answer text is streamed to the server as deltas
+const DRAFT_SEND_INTERVAL = 400;
+let lastSentDraft = '';
+let draftTimer = null;
+
+// Answer waiting for evaluation, restored if the server rejects it
+let pendingAnswer = null;
+
+// Compact protocol frames: one flags byte, then MessagePack, deflated when flagged
+const FRAME_MSGPACK = 0x01;
+const FRAME_DEFLATE = 0x02;
+const compactProtocol = Boolean(window.MessagePack && window.pako);
+
+// Evaluations of this interview by id; the final summary only refers to them
+let receivedEvaluations = {};
+
+// Lets this tab resume its interview after the server restarts
+const RESUME_KEY = 'interviewSessionId';
+
 // DOM elements
 const setupSection = document.getElementById('setup-section');
 const interviewSection = document.getElementById('interview-section');
@@ -21,6 +40,7 @@ const overallFeedback = document.getElementById('overall-feedback');
 const detailedFeedback = document.getElementById('detailed-feedback');
 const restartInterviewBtn = document.getElementById('restart-interview-btn');
 const downloadResultsBtn = document.getElementById('download-results-btn');
+const liveHints = document.getElementById('live-hints');
 
 // Initialize the application
 document.addEventListener('DOMContentLoaded', function() {
@@ -31,17 +51,38 @@ document.addEventListener('DOMContentLoaded', function() {
 
 // Initialize Socket.IO connection
 function initializeSocket() {
-    socket = io();
+    // The server may ask for WebSocket only when it runs several workers
+    socket = io(window.SOCKET_TRANSPORTS && window.SOCKET_TRANSPORTS.length ? { transports: window.SOCKET_TRANSPORTS } : {});
     
     socket.on('connect', () => {
         console.log('Connected to Python Flask server');
+        const sessionId = sessionStorage.getItem(RESUME_KEY);
+        if (sessionId) {
+            socket.emit('resume-interview', { sessionId: sessionId });
+        }
     });
 
     socket.on('interview-started', (data) => {
         console.log('Interview started:', data);
+        sessionStorage.setItem(RESUME_KEY, data.sessionId);
         startInterview(data);
     });
 
+    socket.on('interview-resumed', (data) => {
+        console.log('Interview resumed:', data);
+        currentInterviewData = {
+            candidateName: data.candidateName,
+            role: data.role,
+            startTime: new Date()
+        };
+        chatMessages.innerHTML = '';
+        startInterview({ message: data.message, firstQuestion: data.question });
+    });
+
+    socket.on('resume-failed', () => {
+        sessionStorage.removeItem(RESUME_KEY);
+    });
+
     socket.on('next-question', (questionData) => {
         console.log('Next question:', questionData);
         displayNextQuestion(questionData);
@@ -56,9 +97,35 @@ function initializeSocket() {
         console.log('Interview completed:', summary);
         showInterviewResults(summary);
     });
+    
+    socket.on('answer-result', (frame) => {
+        const result = decodeFrame(frame);
+        console.log('Answer result:', result);
+        displayAnswerEvaluation(result.evaluation);
+        if (result.nextQuestion) {
+            displayNextQuestion(result.nextQuestion);
+        } else if (result.summary) {
+            showInterviewResults(result.summary);
+        }
+    });
+
+    socket.on('interview-feedback-page', (page) => {
+        page.detailedFeedback.forEach((evaluation) => {
+            receivedEvaluations[evaluation.id] = evaluation;
+        });
+        if (currentInterviewData.results) {
+            displayDetailedFeedback(resolveDetailedFeedback(currentInterviewData.results));
+        }
+    });
+
+    socket.on('answer-draft-metrics', (data) => {
+        displayLiveHints(data.metrics);
+    });
 
     socket.on('error', (error) => {
         console.error('Socket error:', error);
+        restorePendingAnswer();
+        if (error.retryAfter) holdSubmitButtons(error.retryAfter);
         showError(error.message);
     });
 }
@@ -97,7 +164,64 @@ function setupCharacterCounter() {
         
         // Enable/disable submit button based on input length
         submitAnswerBtn.disabled = count < 10;
+        
+        scheduleDraftSend();
+    });
+}
+
+// Send the typed answer to the server at most once per DRAFT_SEND_INTERVAL
+function scheduleDraftSend() {
+    if (draftTimer) return;
+    draftTimer = setTimeout(() => {
+        draftTimer = null;
+        sendDraftDelta();
+    }, DRAFT_SEND_INTERVAL);
+}
+
+// Send only what changed since the last draft: everything from the first differing character
+function sendDraftDelta() {
+    const value = answerInput.value;
+    if (!currentQuestion || value === lastSentDraft) return;
+
+    let offset = 0;
+    const max = Math.min(value.length, lastSentDraft.length);
+    while (offset < max && value[offset] === lastSentDraft[offset]) offset++;
+
+    // Don't split a surrogate pair; the server counts code points, not UTF-16 units
+    if (offset > 0 && /[\uD800-\uDBFF]/.test(value[offset - 1])) offset--;
+    const prefix = value.slice(0, offset);
+
+    socket.emit('answer-draft', {
+        offset: Array.from(prefix).length,
+        text: value.slice(offset)
     });
+    lastSentDraft = value;
+}
+
+// Reset draft tracking when the answer box is cleared
+function resetDraft() {
+    if (draftTimer) {
+        clearTimeout(draftTimer);
+        draftTimer = null;
+    }
+    lastSentDraft = '';
+    if (liveHints) liveHints.textContent = '';
+}
+
+// Display live metric hints while the candidate types
+function displayLiveHints(metrics) {
+    if (!liveHints || !metrics) return;
+
+    const hints = [
+        { key: 'technical_score', label: 'Technical' },
+        { key: 'structure_score', label: 'Structure' },
+        { key: 'specificity_score', label: 'Specifics' },
+        { key: 'example_score', label: 'Examples' },
+        { key: 'relevance_score', label: 'On topic' }
+    ];
+    liveHints.textContent = hints
+        .map(hint => `${hint.label} ${Math.round(metrics[hint.key] * 100)}%`)
+        .join(' · ');
 }
 
 // Start interview setup
@@ -117,7 +241,8 @@ function startInterviewSetup(candidateName, role) {
     // Emit start interview event
     socket.emit('start-interview', {
         role: role,
-        candidateName: candidateName
+        candidateName: candidateName,
+        protocol: compactProtocol ? 'compact' : 'json'
     });
 }
 
@@ -131,6 +256,8 @@ function startInterview(data) {
     // Update interview header
     currentRole.textContent = data.message.split(' ').pop().replace('!', '');
     
+    receivedEvaluations = {};
+    
     // Display welcome message
     addMessage('ai', data.message, 'welcome');
     
@@ -161,6 +288,7 @@ function displayNextQuestion(questionData) {
     answerInput.value = '';
     charCount.textContent = '0';
     submitAnswerBtn.disabled = true;
+    resetDraft();
     
     // Focus on answer input
     answerInput.focus();
@@ -188,6 +316,7 @@ function submitAnswer() {
     addMessage('user', answer, 'answer');
 
     // Emit answer to server
+    pendingAnswer = answer;
     socket.emit('submit-answer', {
         answer: answer,
         question: currentQuestion.question
@@ -196,16 +325,51 @@ function submitAnswer() {
     // Clear input
     answerInput.value = '';
     charCount.textContent = '0';
+    resetDraft();
+}
+
+// Put a rejected answer back so the candidate can resubmit it
+function restorePendingAnswer() {
+    if (pendingAnswer === null) return;
+
+    answerInput.value = pendingAnswer;
+    charCount.textContent = pendingAnswer.length;
+    pendingAnswer = null;
+    submitAnswerBtn.disabled = false;
+    submitAnswerBtn.innerHTML = '<i class="fas fa-paper-plane mr-2"></i>Submit Answer';
+}
+
+// Keep the buttons disabled while the server asks us to wait before retrying
+function holdSubmitButtons(seconds) {
+    const startBtn = interviewForm.querySelector('button[type="submit"]');
+    submitAnswerBtn.disabled = true;
+    startBtn.disabled = true;
+    setTimeout(() => {
+        submitAnswerBtn.disabled = answerInput.value.trim().length < 10;
+        startBtn.disabled = false;
+        startBtn.innerHTML = '<i class="fas fa-play mr-2"></i>Start Interview';
+    }, seconds * 1000);
 }
 
 // Display answer evaluation
 function displayAnswerEvaluation(evaluation) {
+    // Compact frames leave out the question and answer this client sent
+    receivedEvaluations[evaluation.id] = Object.assign({
+        question: currentQuestion ? currentQuestion.question : '',
+        answer: pendingAnswer || ''
+    }, evaluation);
+    pendingAnswer = null;
+
     // Re-enable submit button
     submitAnswerBtn.disabled = false;
     submitAnswerBtn.innerHTML = '<i class="fas fa-paper-plane mr-2"></i>Submit Answer';
 
     // Add evaluation to chat
-    addMessage('ai', `Score: ${evaluation.score}/100\n\nFeedback: ${evaluation.feedback}`, 'evaluation');
+    let message = `Score: ${evaluation.score}/100\n\nFeedback: ${evaluation.feedback}`;
+    if (evaluation.percentiles && evaluation.percentiles.question) {
+        message += `\n\nBetter than ${evaluation.percentiles.question.score}% of answers to this question.`;
+    }
+    addMessage('ai', message, 'evaluation');
     
     // Show typing indicator for next question
     showTypingIndicator();
@@ -233,6 +397,38 @@ function hideTypingIndicator() {
     }
 }
 
+// Decode a compact 'answer-result' frame
+function decodeFrame(frame) {
+    const bytes = new Uint8Array(frame);
+    let payload = bytes.subarray(1);
+    if (bytes[0] & FRAME_DEFLATE) {
+        payload = pako.inflate(payload);
+    }
+    if (bytes[0] & FRAME_MSGPACK) {
+        return MessagePack.decode(payload);
+    }
+    return JSON.parse(new TextDecoder().decode(payload));
+}
+
+// Look up the evaluations a summary refers to, asking for pages of any not received
+function resolveDetailedFeedback(summary) {
+    const missingPages = new Set();
+    const items = [];
+    summary.evaluationIds.forEach((id) => {
+        if (receivedEvaluations[id]) {
+            items.push(receivedEvaluations[id]);
+        } else {
+            missingPages.add(Math.floor(id / summary.feedbackPageSize));
+        }
+    });
+    if (!summary.pagesRequested) {
+        summary.pagesRequested = true;
+        missingPages.forEach((page) => socket.emit('request-feedback', { page: page }));
+    }
+    summary.detailedFeedback = items;
+    return items;
+}
+
 // Show interview results
 function showInterviewResults(summary) {
     // Hide interview section and show results
@@ -245,7 +441,7 @@ function showInterviewResults(summary) {
     overallFeedback.textContent = summary.overallFeedback;
     
     // Display detailed feedback
-    displayDetailedFeedback(summary.detailedFeedback);
+    displayDetailedFeedback(resolveDetailedFeedback(summary));
     
     // Display AI insights
     displayAIInsights(summary.aiInsights);
@@ -378,6 +574,7 @@ function restartInterview() {
     interviewForm.reset();
     
     // Reset current data
+    sessionStorage.removeItem(RESUME_KEY);
     currentInterviewData = {};
     currentQuestion = null;
     
@@ -0,0 +1,46 @@
+import os
+import random
+import sys
+
+import pytest
+
+# The modules live at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine import AdvancedAIEngine
+
+# Words and fragments that hit every metric: indicator phrases, list markers,
+# numbers, acronyms, versions, punctuation and role concepts
+ANSWER_PIECES = [
+    'I', 'we', 'the', 'team', 'project', 'because', 'therefore', 'however', 'for example',
+    'such as', 'specifically', 'when i', 'i worked on', 'i developed', 'improved', 'reduced',
+    'failed', 'problem', 'challenging', 'successful', 'resulted in', 'impact', 'efficiency',
+    '30%', '$500', '3 years', '2 months', '10 users', 'API', 'AWS', 'v2.1', 'John Smith',
+    '1. ', '- ', '* ', '.', ',', '!', '?', '\n', 'python', 'algorithms', 'testing', 'debugging',
+    'machine learning', 'statistics', 'roadmap', 'stakeholders', 'design patterns', 'latency',
+]
+
+ROLES = ['software-developer', 'data-scientist', 'product-manager', 'general', 'unknown-role']
+
+def random_answer(rng, max_pieces=120):
+    pieces = [rng.choice(ANSWER_PIECES) for _ in range(rng.randint(0, max_pieces))]
+    return ''.join(piece + rng.choice(['', ' ', ' ', ' ', '  ']) for piece in pieces)
+
+@pytest.fixture(scope='session')
+def engine():
+    return AdvancedAIEngine()
+
+@pytest.fixture
+def rng():
+    return random.Random(1234)
+
+@pytest.fixture
+def answers(rng, engine):
+    """(answer, question, role) triples, including empty and very short answers"""
+    cases = [('', 'Tell me about yourself.', 'general'), ('   ', '', 'general'), ('ok', '', 'software-developer')]
+    for _ in range(200):
+        role = rng.choice(ROLES)
+        bank = engine.question_bank(role).questions
+        question = rng.choice(bank) if bank and rng.random() < 0.8 else random_answer(rng, 10)
+        cases.append((random_answer(rng), question, role))
+    return cases
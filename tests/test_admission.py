@@ -0,0 +1,50 @@
+import pytest
+
+from admission import RateLimiter, parse_limit, retry_after_seconds
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+def test_bucket_allows_a_burst_then_refills():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1, burst=2, clock=clock)
+    
+    assert limiter.acquire('a') == 0.0
+    assert limiter.acquire('a') == 0.0
+    assert limiter.acquire('a') == pytest.approx(1.0)
+    clock.now = 1.0
+    assert limiter.acquire('a') == 0.0
+
+def test_keys_have_separate_buckets():
+    limiter = RateLimiter(rate=1, burst=1, clock=FakeClock())
+    
+    assert limiter.acquire(('submit-answer', 'sid')) == 0.0
+    assert limiter.acquire(('resume-interview', 'sid')) == 0.0
+    assert limiter.acquire(('submit-answer', 'sid')) > 0
+
+def test_refund_gives_tokens_back_up_to_the_burst():
+    limiter = RateLimiter(rate=1, burst=2, clock=FakeClock())
+    limiter.acquire('a')
+    limiter.acquire('a')
+    
+    limiter.refund('a')
+    limiter.refund('a')
+    limiter.refund('a')
+    assert limiter.acquire('a') == 0.0
+    assert limiter.acquire('a') == 0.0
+    assert limiter.acquire('a') > 0
+    limiter.refund('unknown')
+    assert len(limiter) == 1
+
+def test_parse_limit():
+    assert parse_limit('2/10') == (2.0, 10.0)
+    assert parse_limit('') is None
+    with pytest.raises(ValueError):
+        parse_limit('fast')
+    with pytest.raises(ValueError):
+        parse_limit('0/10')
+    assert retry_after_seconds(0.2) == 1
@@ -0,0 +1,41 @@
+from ai_engine import AdvancedAIEngine
+from analysis_cache import AnalysisCache, answer_digest, normalize_answer
+
+WHITESPACE = [' ', '\n', '\t', '  \n']
+
+def test_normalization_only_drops_whitespace_no_metric_sees(engine, answers, rng):
+    for answer, question, role in answers:
+        padded = rng.choice(WHITESPACE) * rng.randint(0, 2) + answer + rng.choice(WHITESPACE) * rng.randint(0, 3)
+        assert engine.analyze_answer_sophistication(normalize_answer(padded), question, role) == \
+            engine.analyze_answer_sophistication(padded, question, role)
+
+def test_padding_variants_share_a_digest():
+    assert answer_digest('\n  1. Done \n\t') == answer_digest('1. Done ') != answer_digest('1. Done')
+
+def test_cached_scores_match_uncached_ones(engine, answers):
+    cached_engine = AdvancedAIEngine(analysis_cache=AnalysisCache())
+    for _ in range(2):
+        for answer, question, role in answers:
+            assert cached_engine.generate_intelligent_score(answer, question, role) == \
+                engine.generate_intelligent_score(answer, question, role)
+    assert cached_engine.analysis_cache.hits >= len(answers)
+
+def test_entries_depend_on_the_question_and_the_fingerprint():
+    cache = AnalysisCache()
+    cache.put('kb-1', 'general', answer_digest('An answer.', 'First question?'), 80, {'length_score': 0.3})
+    
+    assert cache.get('kb-1', 'general', answer_digest('  An answer.', 'First question?')) == (80, {'length_score': 0.3})
+    assert cache.get('kb-1', 'general', answer_digest('An answer.', 'Second question?')) is None
+    assert cache.get('kb-2', 'general', answer_digest('An answer.', 'First question?')) is None
+    assert cache.invalidations == 1
+
+def test_cache_evicts_least_recently_used_entries():
+    cache = AnalysisCache(max_entries=2)
+    for answer in ('one', 'two'):
+        cache.put('kb', 'general', answer_digest(answer), 70, {'length_score': 0.3})
+    cache.get('kb', 'general', answer_digest('one'))
+    cache.put('kb', 'general', answer_digest('three'), 70, {'length_score': 0.3})
+    
+    assert cache.get('kb', 'general', answer_digest('two')) is None
+    assert cache.get('kb', 'general', answer_digest('one')) is not None
+    assert cache.evictions == 1
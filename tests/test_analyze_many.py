@@ -0,0 +1,31 @@
+import pytest
+
+from ai_engine import SCORE_WEIGHTS
+
+def test_analyze_many_matches_generate_intelligent_score(engine, answers):
+    texts, questions, roles = zip(*answers)
+    
+    assert engine.analyze_many(texts, questions, roles) == [
+        engine.generate_intelligent_score(answer, question, role) for answer, question, role in answers
+    ]
+
+def test_analyze_many_broadcasts_a_single_question_and_role(engine, answers):
+    texts = [answer for answer, _, _ in answers]
+    question = 'Tell me about a challenging project.'
+    
+    assert engine.analyze_many(texts, question, 'software-developer') == [
+        engine.generate_intelligent_score(text, question, 'software-developer') for text in texts
+    ]
+
+def test_analyze_many_uses_the_given_weights(engine, answers):
+    texts, questions, roles = zip(*answers)
+    weights = {key: 1 / len(SCORE_WEIGHTS) for key in SCORE_WEIGHTS}
+    
+    weighted = engine.analyze_many(texts, questions, roles, weights)
+    for (score, metrics), (_, expected) in zip(weighted, engine.analyze_many(texts, questions, roles)):
+        assert metrics == expected
+        assert score == engine._final_score(sum(metrics[key] * weights[key] for key in weights))
+
+def test_analyze_many_rejects_mismatched_lengths(engine):
+    with pytest.raises(ValueError):
+        engine.analyze_many(['one', 'two'], ['question'], ['general', 'general'])
@@ -0,0 +1,58 @@
+from ai_engine import AIInterviewer, DRAFT_FINALIZE_CHARS
+
+def type_answer(rng, draft, answer):
+    """Send answer to a draft as the browser would, yielding the text after each update
+    
+    Mostly appends, plus the odd typo further back that is then corrected.
+    """
+    position = 0
+    while position < len(answer):
+        if position and rng.random() < 0.15:
+            offset = rng.randrange(position)
+            draft.update(offset, 'typo, ')
+            yield answer[:offset] + 'typo, '
+            draft.update(offset, answer[offset:position])
+            yield answer[:position]
+            continue
+        step = rng.randint(1, 40)
+        draft.update(position, answer[position:position + step])
+        position = min(len(answer), position + step)
+        yield answer[:position]
+
+def test_draft_metrics_match_full_analysis_while_typing(engine, answers, rng):
+    for answer, question, role in answers:
+        draft = engine.start_draft(role, question)
+        for text in type_answer(rng, draft, answer):
+            if rng.random() < 0.1:
+                assert draft.metrics() == engine.analyze_answer_sophistication(text, question, role)
+        assert draft.metrics() == engine.analyze_answer_sophistication(answer, question, role)
+
+def test_draft_replace_matches_full_analysis(engine, answers, rng):
+    for answer, question, role in answers:
+        draft = engine.start_draft(role, question)
+        typed = answer[:rng.randint(0, len(answer))]
+        draft.update(0, typed)
+        # The submitted answer may differ from the last draft anywhere
+        submitted = answer if rng.random() < 0.5 else answer[:len(answer) // 2] + 'edited ' + answer[len(answer) // 2:]
+        draft.replace(submitted)
+        
+        assert draft.text == submitted
+        assert draft.metrics() == engine.analyze_answer_sophistication(submitted, question, role)
+
+def test_finalize_draft_uses_the_draft_or_leaves_the_answer_to_full_analysis(engine):
+    interviewer = AIInterviewer('software-developer', engine)
+    question = interviewer.get_next_question()['question']
+    answer = 'I developed a Python API because latency mattered. For example we reduced costs by 30%. '
+    
+    interviewer.update_draft(0, answer[:40])
+    assert interviewer.finalize_draft(answer, question) == engine.analyze_answer_sophistication(
+        answer, question, 'software-developer')
+    assert interviewer.draft is None
+    
+    # A large paste on submit is analyzed in full elsewhere, not finalized here
+    interviewer.update_draft(0, answer)
+    assert interviewer.finalize_draft(answer * (DRAFT_FINALIZE_CHARS // len(answer) + 2), question) is None
+    assert interviewer.draft is None
+    
+    interviewer.update_draft(0, answer)
+    assert interviewer.finalize_draft(answer, question, max_chars=len(answer) - 1) is None
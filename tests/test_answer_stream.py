@@ -0,0 +1,35 @@
+import ai_engine
+from ai_engine import analyze_answer, iter_text_chunks
+
+def chunked(rng, answer):
+    position = 0
+    while position < len(answer):
+        step = rng.choice([1, 2, 7, 64, 500])
+        yield answer[position:position + step]
+        position += step
+
+def test_stream_matches_full_analysis(engine, answers, rng):
+    for answer, question, role in answers:
+        assert engine.analyze_answer_stream(chunked(rng, answer), question, role) == \
+            engine.analyze_answer_sophistication(answer, question, role)
+
+def test_stream_budget_scores_the_start_of_the_answer(engine, answers, rng):
+    for answer, question, role in answers:
+        max_chars = rng.randint(0, len(answer) + 10)
+        assert engine.analyze_answer_stream(chunked(rng, answer), question, role, max_chars) == \
+            engine.analyze_answer_sophistication(answer[:max_chars], question, role)
+
+def test_long_answers_are_streamed_with_the_same_result(engine, answers, monkeypatch):
+    monkeypatch.setattr(ai_engine, 'STREAMING_ANSWER_CHARS', 50)
+    monkeypatch.setattr(ai_engine, 'STREAM_CHUNK_CHARS', 16)
+    for answer, question, role in answers:
+        score, metrics, _, _ = analyze_answer(answer, question, role, engine)
+        assert (score, metrics) == engine.generate_intelligent_score(answer, question, role)
+
+def test_iter_text_chunks_reads_strings_and_files(tmp_path):
+    path = tmp_path / 'answer.txt'
+    path.write_text('abcdefghij')
+    
+    assert list(iter_text_chunks('abcdefghij', 4)) == ['abcd', 'efgh', 'ij']
+    with open(path) as answer_file:
+        assert list(iter_text_chunks(answer_file, 4)) == ['abcd', 'efgh', 'ij']
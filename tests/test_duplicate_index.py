@@ -0,0 +1,55 @@
+import duplicate_index
+from duplicate_index import DuplicateIndex
+
+ANSWER = ' '.join(
+    'I rebuilt the deployment pipeline for our payments service so that every merge ran the full test '
+    'suite in parallel and shipped to production within twenty minutes of review'.split()
+)
+
+def test_flags_a_copied_answer_from_another_interview():
+    index = DuplicateIndex()
+    assert index.check('first', ANSWER) is None
+    
+    match = index.check('second', ANSWER + ' today')
+    assert match is not None and match.similarity >= index.threshold
+
+def test_ignores_the_interviews_own_answers():
+    index = DuplicateIndex()
+    index.check('first', ANSWER)
+    
+    assert index.check('first', ANSWER) is None
+
+def test_own_answers_do_not_crowd_out_other_interviews(monkeypatch):
+    monkeypatch.setattr(duplicate_index, 'MAX_CANDIDATES', 4)
+    index = DuplicateIndex()
+    signature = index.signature(ANSWER)
+    for _ in range(10):
+        index.add('mine', signature)
+    index.add('other', signature)
+    
+    match = index.query(signature, 'mine')
+    assert match is not None and match.matches == 1
+
+def test_prunes_the_oldest_answers_beyond_capacity():
+    index = DuplicateIndex(max_answers=3, max_age=None)
+    signature = index.signature(ANSWER)
+    for owner in ('a', 'b', 'c', 'd', 'e'):
+        index.add(owner, signature)
+    
+    assert index.prune() == 2
+    assert len(index) == 3
+    assert index._db.execute('SELECT COUNT(DISTINCT answer_id) FROM answer_bands').fetchone()[0] == 3
+    assert {row[0] for row in index._db.execute('SELECT owner FROM answer_signatures')} == {'c', 'd', 'e'}
+
+def test_prunes_answers_older_than_max_age():
+    index = DuplicateIndex(max_answers=None, max_age=60)
+    signature = index.signature(ANSWER)
+    index.add('old', signature)
+    
+    added = index._db.execute('SELECT added FROM answer_signatures').fetchone()[0]
+    
+    assert index.prune(added + 59) == 0
+    assert index.prune(added + 61) == 1
+    assert len(index) == 0
+    assert index.query(signature) is None
+    assert index.pruned == 1
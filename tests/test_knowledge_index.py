@@ -0,0 +1,80 @@
+import pytest
+
+from ai_engine import AdvancedAIEngine
+from knowledge_index import KnowledgeIndex, compile_knowledge_base, export_builtin, load_knowledge_source
+
+@pytest.fixture(scope='module')
+def compiled_path(tmp_path_factory):
+    source = tmp_path_factory.mktemp('knowledge')
+    export_builtin(str(source))
+    path = str(tmp_path_factory.mktemp('compiled') / 'knowledge.idx')
+    compile_knowledge_base(load_knowledge_source(str(source)), path)
+    return path
+
+@pytest.fixture(scope='module')
+def compiled_engine(compiled_path):
+    return AdvancedAIEngine(knowledge_index=compiled_path)
+
+def test_compiled_index_keeps_the_builtin_roles(engine, compiled_engine):
+    assert set(compiled_engine.question_banks) == set(engine.question_banks)
+    for role in engine.question_banks:
+        assert tuple(compiled_engine.question_banks[role]) == tuple(engine.question_banks[role])
+    for role in engine.knowledge_base:
+        for field, values in engine.knowledge_base[role].items():
+            assert list(compiled_engine.knowledge_base[role][field]) == list(values)
+
+def test_compiled_index_scores_like_the_builtin_engine(engine, compiled_engine, answers):
+    for answer, question, role in answers:
+        assert compiled_engine.generate_intelligent_score(answer, question, role) == \
+            engine.generate_intelligent_score(answer, question, role)
+
+def test_compiled_index_batch_scores_like_the_builtin_engine(engine, compiled_engine, answers):
+    texts, questions, roles = zip(*answers)
+    
+    assert compiled_engine.analyze_many(texts, questions, roles) == engine.analyze_many(texts, questions, roles)
+
+def test_compiled_index_keeps_question_tags_and_references(tmp_path):
+    roles = {'sre': {
+        'concepts': ['latency', 'error budget'],
+        'questions': [
+            'Describe an outage you handled.',
+            {'text': 'How do you set an SLO?', 'tags': ['technical_score', 'impact_score'],
+             'references': ['error budget']}
+        ]
+    }}
+    path = str(tmp_path / 'knowledge.idx')
+    compile_knowledge_base(roles, path)
+    index = KnowledgeIndex(path)
+    
+    assert tuple(index.question_banks['sre']) == ('Describe an outage you handled.', 'How do you set an SLO?')
+    assert tuple(index.question_tags['sre']) == ((), ('technical_score', 'impact_score'))
+    assert tuple(index.question_references['sre']) == ((), ('error budget',))
+    assert list(index.knowledge_base['sre']['concepts']) == ['latency', 'error budget']
+    
+    bank = AdvancedAIEngine(knowledge_index=index).question_bank('sre')
+    assert list(bank.buckets['technical_score']) == [1]
+    assert list(bank.buckets['impact_score']) == [1]
+    assert 1 not in bank.buckets.get('example_score', ())
+
+def test_rejects_tags_that_name_no_metric(tmp_path):
+    roles = {'sre': {'questions': [{'text': 'How do you set an SLO?', 'tags': ['technical']}]}}
+    
+    with pytest.raises(ValueError, match='technical_score'):
+        compile_knowledge_base(roles, str(tmp_path / 'knowledge.idx'))
+
+def test_recompiling_marks_the_index_changed(tmp_path):
+    path = str(tmp_path / 'knowledge.idx')
+    compile_knowledge_base({'sre': {'questions': ['One?']}}, path)
+    index = KnowledgeIndex(path)
+    assert not index.changed()
+    
+    compile_knowledge_base({'sre': {'questions': ['One?', 'Two?']}}, path)
+    assert index.changed()
+    assert tuple(KnowledgeIndex(path).question_banks['sre']) == ('One?', 'Two?')
+
+def test_rejects_a_file_that_is_not_an_index(tmp_path):
+    path = tmp_path / 'knowledge.idx'
+    path.write_bytes(b'not an index' * 8)
+    
+    with pytest.raises(ValueError):
+        KnowledgeIndex(str(path))
@@ -0,0 +1,82 @@
+import threading
+import uuid
+
+import pytest
+
+socketio = pytest.importorskip('socketio')
+
+from message_queue import LocalPubSubManager, message_queue_options
+
+class Worker:
+    """A Socket.IO server on the local bus, recording what it sends to its clients"""
+    
+    def __init__(self, channel):
+        self.manager = LocalPubSubManager(channel=channel)
+        self.server = socketio.Server(async_mode='threading', client_manager=self.manager)
+        self.sent = []
+        self.delivered = threading.Event()
+        # Pretend the first connection already happened, which starts the listener
+        self.server.manager_initialized = True
+        self.manager.initialize()
+        if hasattr(self.server, '_emit_internal'):
+            self.server._emit_internal = self._record_emit
+        else:
+            self.server._send_packet = self._record_packet
+    
+    def _record_emit(self, eio_sid, event, data, namespace=None, id=None):
+        self.sent.append((eio_sid, event, data))
+        self.delivered.set()
+    
+    def _record_packet(self, eio_sid, packet):
+        event, data = packet.data[0], packet.data[1]
+        self.sent.append((eio_sid, event, data))
+        self.delivered.set()
+    
+    def join(self, eio_sid, room):
+        sid = self.manager.connect(eio_sid, '/')
+        self.manager.enter_room(sid, '/', room)
+        return sid
+    
+    def close(self):
+        self.manager.close()
+
+@pytest.fixture
+def workers():
+    channel = f'test-{uuid.uuid4().hex}'
+    started = [Worker(channel), Worker(channel)]
+    yield started
+    for worker in started:
+        worker.close()
+
+def test_emit_reaches_a_room_on_another_worker(workers):
+    sender, receiver = workers
+    receiver.join('candidate', 'interview-1')
+    receiver.join('bystander', 'interview-2')
+    
+    sender.server.emit('next-question', {'question': 'Why?'}, to='interview-1')
+    
+    assert receiver.delivered.wait(5)
+    assert receiver.sent == [('candidate', 'next-question', {'question': 'Why?'})]
+    assert sender.sent == []
+
+def test_closed_manager_stops_receiving(workers):
+    sender, receiver = workers
+    receiver.join('candidate', 'interview-1')
+    receiver.close()
+    
+    sender.server.emit('next-question', {'question': 'Why?'}, to='interview-1')
+    
+    assert not receiver.delivered.wait(0.2)
+
+def test_unpicklable_payloads_fail_like_on_a_real_queue(workers):
+    sender, _ = workers
+    
+    with pytest.raises(Exception):
+        sender.server.emit('next-question', {'callback': lambda: None}, to='interview-1')
+
+def test_message_queue_options():
+    assert message_queue_options('') == {}
+    assert isinstance(message_queue_options('local://')['client_manager'], LocalPubSubManager)
+    assert message_queue_options('redis://localhost:6379/0', 'interviews') == {
+        'message_queue': 'redis://localhost:6379/0', 'channel': 'interviews'
+    }
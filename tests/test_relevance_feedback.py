@@ -0,0 +1,40 @@
+from ai_engine import AdvancedAIEngine, AIInterviewer
+from knowledge_index import compile_knowledge_base
+
+RELEVANCE_FEEDBACK = "Make sure your answer addresses the question that was asked."
+RELEVANCE_AREA = "Answering the question that was asked"
+OFF_TOPIC = 'I enjoy hiking on weekends and cooking pasta with my family in the summer.'
+
+def test_no_relevance_feedback_without_reference_answers(engine):
+    question = 'How do you measure product success and what metrics do you track?'
+    answer = 'I track retention, weekly active users and conversion, and review the KPIs with the team each sprint.'
+    score, metrics = engine.generate_intelligent_score(answer, question, 'product-manager')
+    
+    assert not engine.has_reference_answers(question, 'product-manager')
+    assert RELEVANCE_FEEDBACK not in engine.generate_intelligent_feedback(answer, question, 'product-manager', metrics)
+    
+    interviewer = AIInterviewer('product-manager', engine)
+    interviewer.get_next_question()
+    interviewer.evaluate_answer(OFF_TOPIC, interviewer.current_question)
+    assert RELEVANCE_AREA not in interviewer.get_interview_summary()['improvementAreas']
+
+def test_relevance_feedback_with_reference_answers(tmp_path):
+    path = str(tmp_path / 'knowledge.idx')
+    compile_knowledge_base({'sre': {
+        'concepts': ['latency', 'error budget'],
+        'questions': [{
+            'text': 'How do you set an SLO?',
+            'references': ['We pick latency and availability targets from user journeys and track the error budget.']
+        }]
+    }}, path)
+    engine = AdvancedAIEngine(knowledge_index=path)
+    question = 'How do you set an SLO?'
+    _, metrics = engine.generate_intelligent_score(OFF_TOPIC, question, 'sre')
+    
+    assert engine.has_reference_answers(question, 'sre')
+    assert RELEVANCE_FEEDBACK in engine.generate_intelligent_feedback(OFF_TOPIC, question, 'sre', metrics)
+    
+    interviewer = AIInterviewer('sre', engine)
+    interviewer.get_next_question()
+    interviewer.evaluate_answer(OFF_TOPIC, interviewer.current_question)
+    assert RELEVANCE_AREA in interviewer.get_interview_summary()['improvementAreas']
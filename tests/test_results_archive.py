@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+
+from ai_engine import AIInterviewer
+from results_archive import ResultArchive, iter_export
+
+def completed_session(candidate_name, answers):
+    interviewer = AIInterviewer('software-developer')
+    interviewer.get_next_question()
+    for answer in answers:
+        interviewer.evaluate_answer(answer, interviewer.current_question)
+        interviewer.get_next_question()
+    return {
+        'id': uuid.uuid4().hex,
+        'interviewer': interviewer,
+        'candidateName': candidate_name,
+        'startTime': datetime(2026, 1, 2, 3, 0, 0),
+        'endTime': datetime(2026, 1, 2, 4, 0, 0),
+        'status': 'completed',
+        'summary': interviewer.get_interview_summary()
+    }
+
+def export_rows(archive):
+    return list(csv.DictReader(io.StringIO(''.join(iter_export(archive.iter_range(), 'csv')))))
+
+def test_csv_export_quotes_cells_that_spreadsheets_would_evaluate(tmp_path):
+    archive = ResultArchive(str(tmp_path / 'results.db'))
+    archive.add(completed_session('=HYPERLINK("http://example.com","x")', [
+        '+1 I cut deploy time from 40 to 5 minutes.',
+        '-2 then ran the numbers again.',
+        '@SUM(A1:A2) was my answer.',
+        'A plain answer about caching.'
+    ]))
+    
+    rows = export_rows(archive)
+    assert [row['answer'] for row in rows] == [
+        "'+1 I cut deploy time from 40 to 5 minutes.",
+        "'-2 then ran the numbers again.",
+        "'@SUM(A1:A2) was my answer.",
+        'A plain answer about caching.'
+    ]
+    assert {row['candidateName'] for row in rows} == {'\'=HYPERLINK("http://example.com","x")'}
+
+def test_json_exports_keep_the_original_text(tmp_path):
+    archive = ResultArchive(str(tmp_path / 'results.db'))
+    archive.add(completed_session('=Ada', ['-1 is the answer.']))
+    
+    record = json.loads(''.join(iter_export(archive.iter_range(), 'ndjson')))
+    assert record['candidateName'] == '=Ada'
+    assert record['evaluations'][0]['answer'] == '-1 is the answer.'
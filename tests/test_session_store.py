@@ -0,0 +1,151 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from ai_engine import AIInterviewer
+from session_store import (
+    MemorySessionStore, RedisSessionStore, SQLiteSessionStore, create_session_store, deserialize_session,
+    serialize_session, session_state
+)
+
+ANSWERS = [
+    'I led the migration of our billing service to PostgreSQL, which cut query latency by 40 percent.',
+    'First I reproduced the bug, then I added a failing test and fixed the race in the cache.',
+]
+
+def make_session(role='software-developer', question_mode='sequential'):
+    interviewer = AIInterviewer(role, question_mode=question_mode)
+    interviewer.get_next_question()
+    for answer in ANSWERS:
+        interviewer.evaluate_answer(answer, interviewer.current_question)
+        interviewer.get_next_question()
+    return {
+        'id': uuid.uuid4().hex,
+        'interviewer': interviewer,
+        'candidateName': 'Ada',
+        'startTime': datetime(2026, 1, 2, 3, 4, 5),
+        'status': 'active',
+        'protocol': 'json'
+    }
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemorySessionStore()
+    if request.param == 'sqlite':
+        return SQLiteSessionStore(str(tmp_path / 'sessions.db'))
+    fakeredis = pytest.importorskip('fakeredis')
+    return RedisSessionStore(fakeredis.FakeRedis())
+
+@pytest.mark.parametrize('question_mode', AIInterviewer.QUESTION_MODES)
+def test_serialized_session_round_trips(question_mode):
+    session = make_session(question_mode=question_mode)
+    session['status'] = 'completed'
+    session['endTime'] = datetime(2026, 1, 2, 4, 0, 0)
+    session['summary'] = {'averageScore': 7.5}
+    
+    restored = deserialize_session(serialize_session(session))
+    
+    assert session_state(restored) == session_state(session)
+    assert restored['interviewer'].current_question == session['interviewer'].current_question
+    assert restored['interviewer'].stats.describe() == session['interviewer'].stats.describe()
+
+def test_store_round_trips_a_session(store):
+    session = make_session()
+    store.save(session['id'], session)
+    
+    assert session['id'] in store
+    assert session_state(store.get(session['id'])) == session_state(session)
+    assert store.get('missing') is None
+    assert 'missing' not in store
+
+def test_store_sees_later_saves(store):
+    session = make_session()
+    store.save(session['id'], session)
+    session['interviewer'].evaluate_answer(ANSWERS[0], session['interviewer'].current_question)
+    session['status'] = 'completed'
+    store.save(session['id'], session)
+    store.release(session['id'])
+    
+    restored = store.get(session['id'])
+    assert restored['status'] == 'completed'
+    assert len(restored['interviewer'].interview_history) == len(ANSWERS) + 1
+
+def test_store_deletes_a_session(store):
+    session = make_session()
+    store.save(session['id'], session)
+    store.delete(session['id'])
+    
+    assert store.get(session['id']) is None
+    assert session['id'] not in store
+
+def test_shared_store_reuses_the_live_session_until_another_worker_saves(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    first, second = SQLiteSessionStore(path), SQLiteSessionStore(path)
+    session = make_session()
+    first.save(session['id'], session)
+    
+    assert first.get(session['id']) is session
+    loaded = second.get(session['id'])
+    assert loaded is not session
+    assert second.get(session['id']) is loaded
+    
+    loaded['status'] = 'completed'
+    second.save(session['id'], loaded)
+    assert first.get(session['id'])['status'] == 'completed'
+
+def test_shared_store_release_keeps_the_stored_session(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / 'sessions.db'))
+    session = make_session()
+    store.save(session['id'], session)
+    store.release(session['id'])
+    
+    restored = store.get(session['id'])
+    assert restored is not session
+    assert session_state(restored) == session_state(session)
+
+def test_memory_store_expires_sessions():
+    clock = FakeClock()
+    store = MemorySessionStore(ttl=10, clock=clock)
+    old, new = make_session(), make_session()
+    store.save(old['id'], old)
+    clock.now = 5
+    store.save(new['id'], new)
+    
+    clock.now = 12
+    assert store.get(old['id']) is None
+    assert store.get(new['id']) is new
+    store.save(new['id'], new)
+    assert len(store) == 1
+
+def test_sqlite_store_expires_sessions(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / 'sessions.db'), ttl=-1)
+    session = make_session()
+    store.save(session['id'], session)
+    
+    assert store.get(session['id']) is None
+    assert session['id'] not in store
+
+def test_redis_store_sets_a_ttl():
+    fakeredis = pytest.importorskip('fakeredis')
+    client = fakeredis.FakeRedis()
+    store = RedisSessionStore(client, ttl=60)
+    session = make_session()
+    store.save(session['id'], session)
+    
+    assert 0 < client.ttl(store.prefix + session['id']) <= 60
+
+def test_create_session_store(tmp_path):
+    assert isinstance(create_session_store('memory', 30), MemorySessionStore)
+    store = create_session_store(f"sqlite:///{tmp_path / 'sessions.db'}", 30)
+    assert isinstance(store, SQLiteSessionStore) and store.ttl == 30
+    with pytest.raises(ValueError):
+        create_session_store('postgres://localhost/sessions')